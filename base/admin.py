@@ -1,14 +1,15 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth.forms import UserChangeForm
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 from django_ai.supervised_learning.admin import \
     HGBTreeClassifierAdmin, SVCAdmin
 
 from .models import (
-    CurrentClassifier, DecisionTree, ExternalClassifier, NetworkErrorLog,
-    NetworkNode, SVM, User, )
+    CurrentClassifier, DataSharingOutbox, DecisionTree, ExternalClassifier,
+    NetworkErrorLog, NetworkNode, SVM, User, )
 
 
 class CovidHTUserChangeForm(UserChangeForm):
@@ -135,6 +136,7 @@ class NetworkNodeAdmin(admin.ModelAdmin):
             'fields': (
                 ('data_sharing_is_enabled',),
                 ('data_sharing_mode',),
+                ('data_sync_is_enabled', 'data_sync_cursor'),
             ),
         }),
         (_("Classification Service"), {
@@ -152,7 +154,7 @@ class NetworkNodeAdmin(admin.ModelAdmin):
         (_("Endpoints"), {
             'classes': ('collapse',),
             'fields': (
-                ('endpoint_data',),
+                ('endpoint_data', 'endpoint_data_bulk'),
                 ('endpoint_classify', 'endpoint_classify_dataset'),
             ),
         }),
@@ -169,3 +171,17 @@ class NetworkNodeAdmin(admin.ModelAdmin):
 @admin.register(NetworkErrorLog)
 class NetworkErrorLogAdmin(admin.ModelAdmin):
     pass
+
+
+@admin.register(DataSharingOutbox)
+class DataSharingOutboxAdmin(admin.ModelAdmin):
+    list_display = ('data', 'node', 'status', 'attempts', 'next_attempt')
+    list_filter = ('node', 'status', )
+    actions = ['requeue']
+
+    @admin.action(description=_("Requeue selected entries"))
+    def requeue(self, request, queryset):
+        queryset.update(
+            status=DataSharingOutbox.STATUS_PENDING, attempts=0,
+            next_attempt=timezone.now()
+        )
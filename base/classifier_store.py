@@ -0,0 +1,89 @@
+import glob
+import os
+import stat
+
+import joblib
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+
+ARTIFACT_PREFIX = "current-classifier-"
+ARTIFACT_SUFFIX = ".joblib"
+
+
+def get_store_dir(create=False):
+    """
+    Returns the directory of the store - creating it private to the user of
+    the process if asked for - after checking that no other user can write
+    in it, as the artifacts are unpickled from there.
+    """
+    path = settings.CLASSIFIER_STORE_DIR
+    if create:
+        os.makedirs(path, mode=0o700, exist_ok=True)
+    try:
+        info = os.stat(path)
+    except FileNotFoundError:
+        return path
+    if info.st_uid != os.getuid() or \
+            info.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+        raise ImproperlyConfigured(
+            "CLASSIFIER_STORE_DIR (%s) must be owned by the user of the "
+            "instance and not writable by others" % path
+        )
+    return path
+
+
+def get_artifact_path(version):
+    return os.path.join(
+        get_store_dir(),
+        "{0}{1}{2}".format(ARTIFACT_PREFIX, version, ARTIFACT_SUFFIX)
+    )
+
+
+def dump(instance, version):
+    """
+    Stores the (loaded) Current Classifier as the artifact of the version,
+    replacing the artifacts of other versions.
+    """
+    get_store_dir(create=True)
+    path = get_artifact_path(version)
+    tmp_path = "{0}.{1}.tmp".format(path, os.getpid())
+    joblib.dump(instance, tmp_path)
+    # Atomic, so other processes never load a partially written artifact
+    os.replace(tmp_path, path)
+    clear(keep=path)
+
+
+def load(version):
+    """
+    Returns the Current Classifier stored for the version, with its arrays
+    memory-mapped so they are shared among processes, or None if there is
+    no artifact for it.
+    """
+    try:
+        return joblib.load(get_artifact_path(version), mmap_mode='r')
+    except FileNotFoundError:
+        return None
+
+
+def clear(keep=None):
+    """
+    Removes the stored artifacts, or the ones older than the one to keep if
+    provided - as another process may have stored a newer version after
+    it. Processes which have mapped a removed artifact keep using it until
+    they reload.
+    """
+    pattern = os.path.join(
+        get_store_dir(),
+        "{0}*{1}".format(ARTIFACT_PREFIX, ARTIFACT_SUFFIX)
+    )
+    keep_mtime = os.stat(keep).st_mtime if keep else None
+    for path in glob.glob(pattern):
+        if path == keep:
+            continue
+        try:
+            if keep_mtime is None or os.stat(path).st_mtime < keep_mtime:
+                os.remove(path)
+        except OSError:  # pragma: no cover
+            pass
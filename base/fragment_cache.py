@@ -0,0 +1,56 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import get_language
+
+
+VERSION_KEY_PREFIX = "fragments-version:"
+
+
+def _new_version():
+    # Time-based, so a version evicted from the cache is not reused
+    return time.time_ns() // 1000
+
+
+def get_version(*names):
+    """
+    Returns the version stamp of the cached fragments of the HTML front-end
+    which depend on the names (i.e. 'data', 'classifier') in the current
+    language, to be used for varying them (see renew).
+    """
+    keys = [VERSION_KEY_PREFIX + name for name in names]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            version = _new_version()
+            if not cache.add(key, version, None):
+                version = cache.get(key, version)
+            versions[key] = version
+    return "{0}:{1}".format(
+        get_language(), "-".join(str(versions[key]) for key in keys)
+    )
+
+
+def renew(name):
+    """
+    Renews the version of the name, so the cached fragments depending on it
+    are not used anymore (and expire on their own).
+    """
+    key = VERSION_KEY_PREFIX + name
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _new_version(), None)
+
+
+def get_context(*names):
+    """
+    Returns the context for caching the fragments depending on the names
+    with the ``cache`` template tag, i.e.
+    ``{% cache fragments_timeout "name" fragments_version %}``.
+    """
+    return {
+        'fragments_version': get_version(*names),
+        'fragments_timeout': settings.FRAGMENTS_CACHE_TIMEOUT,
+    }
@@ -0,0 +1,258 @@
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import logging
+from numbers import Number
+import threading
+from uuid import uuid4
+
+import numpy as np
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+
+GRAPH_PENDING = "pending"
+GRAPH_DONE = "done"
+GRAPH_ERROR = "error"
+
+# Output formats of the graphs and their content types
+GRAPH_FORMATS = {
+    "svg": "image/svg+xml",
+    "png": "image/png",
+    "webp": "image/webp",
+    "json": "application/json",
+}
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_cache_key(*parts):
+    """
+    Returns a cache key for graphing derived from the parts (which may be
+    arbitrarily long, i.e. observations).
+    """
+    digest = hashlib.md5(repr(parts).encode('utf-8')).hexdigest()
+    return "graphing:{0}".format(digest)
+
+
+def get_columns_ranges(data):
+    """
+    Returns the (min, max) of each column of the data matrix, or None for
+    the columns which are not numeric or have no values.
+    """
+    ranges = []
+    for index in range(data.shape[1] if data.ndim == 2 else 0):
+        try:
+            column = data[:, index].astype('float')
+        except (TypeError, ValueError):
+            ranges.append(None)
+            continue
+        column = column[~np.isnan(column)]
+        if column.size:
+            ranges.append((float(column.min()), float(column.max())))
+        else:
+            ranges.append(None)
+    return ranges
+
+
+def quantize_observation(obs, pair, ranges, buckets):
+    """
+    Returns the observation (as a list) with the coordinates which remain
+    fixed on the plane of the pair snapped to the center of its bucket -
+    each column range split in the amount of buckets - and the ones of the
+    pair (which are given by the mesh) removed, so mesh evaluations of close
+    observations may be reused.
+    """
+    quantized = [None if index in pair else v for index, v in enumerate(obs)]
+    if not buckets:
+        return quantized
+    for index, value in enumerate(obs):
+        if index in pair or index >= len(ranges) or not ranges[index] \
+                or isinstance(value, bool) \
+                or not isinstance(value, Number):
+            continue
+        low, high = ranges[index]
+        width = (high - low) / buckets
+        if width > 0:
+            bucket = np.floor((float(value) - low) / width)
+            quantized[index] = float(low + (bucket + 0.5) * width)
+    return quantized
+
+
+def _is_missing(value):
+    return value is None or (isinstance(value, float) and np.isnan(value))
+
+
+def impute_grid(imputer, grid, pair):
+    """
+    Imputes a mesh grid - where only the columns of the pair vary - as a
+    matrix: the missing values of the constant part are imputed once, with
+    the columns of the pair masked so they do not depend on the point of the
+    grid, and broadcast over it. The grid is returned as a float matrix
+    when all its columns are numeric, so the engine does not convert it on
+    each evaluation.
+    """
+    missing = [
+        index for index in range(grid.shape[1])
+        if index not in pair and _is_missing(grid[0, index])
+    ]
+    if missing and len(grid):
+        row = [None if index in pair else value
+               for index, value in enumerate(grid[0])]
+        imputed = imputer.impute_row(row)
+        grid = grid.copy()
+        for index in missing:
+            grid[:, index] = imputed[index]
+    try:
+        return grid.astype(float)
+    except (TypeError, ValueError):
+        # Non-numeric columns (i.e. categorical ones) are left to the engine
+        return grid
+
+
+def sample_dataset(targets, size, seed=0):
+    """
+    Returns the (sorted) indexes of a sample of at most size rows of the
+    dataset, stratified by class so the proportions of the classes are
+    kept.
+    """
+    targets = np.asarray(targets)
+    if len(targets) <= size:
+        return np.arange(len(targets))
+    rng = np.random.default_rng(seed)
+    indexes = []
+    for label in np.unique(targets):
+        label_indexes = np.flatnonzero(targets == label)
+        label_size = max(1, int(round(
+            size * len(label_indexes) / len(targets)
+        )))
+        indexes.append(rng.choice(
+            label_indexes, size=min(label_size, len(label_indexes)),
+            replace=False
+        ))
+    return np.sort(np.concatenate(indexes))
+
+
+def get_pairs_densities(data, targets, ranges, pairs, bins):
+    """
+    Returns the density of each class of the dataset on the planes of the
+    pairs of columns, as 2D histograms of bins per axis over the ranges of
+    the columns.
+    """
+    targets = np.asarray(targets).astype(bool)
+    densities = {}
+    for pair in pairs:
+        if not ranges[pair[0]] or not ranges[pair[1]]:
+            continue
+        x = data[:, pair[0]].astype('float')
+        y = data[:, pair[1]].astype('float')
+        finite = ~np.isnan(x) & ~np.isnan(y)
+        density = {
+            "range": [*ranges[pair[0]], *ranges[pair[1]]],
+            "bins": bins,
+        }
+        for label, mask in (("NEGATIVE", ~targets), ("POSITIVE", targets)):
+            counts, _, _ = np.histogram2d(
+                x[finite & mask], y[finite & mask], bins=bins,
+                range=[ranges[pair[0]], ranges[pair[1]]]
+            )
+            # Rows along the y axis, as the decision function
+            density[label] = counts.T.astype(int).tolist()
+        densities[tuple(pair)] = density
+    return densities
+
+
+def planes_to_json(planes, densities):
+    """
+    Returns a compact representation of the planes for drawing them on the
+    client-side: the Conditional Decision Function downsampled to about
+    GRAPHING_JSON_GRID_STEPS per axis and the (precomputed) density of each
+    class of the dataset.
+    """
+    json_planes = []
+    for plane in planes:
+        json_plane = {
+            "fields": plane["fields"],
+            "axis": [float(v) for v in plane["axis"]],
+            "observation": [float(v) for v in plane["observation"]],
+        }
+        if plane["mesh"]:
+            xx, yy, Z = plane["mesh"]
+            step = max(1, int(np.ceil(
+                max(Z.shape) / settings.GRAPHING_JSON_GRID_STEPS
+            )))
+            json_plane["decision_function"] = {
+                "x": xx[0, ::step].round(4).tolist(),
+                "y": yy[::step, 0].round(4).tolist(),
+                "z": Z[::step, ::step].round(3).tolist(),
+            }
+        density = densities.get(tuple(plane["pair"]), None)
+        if settings.GRAPHING_DATASET and density:
+            json_plane["density"] = density
+        json_planes.append(json_plane)
+    return {"planes": json_planes}
+
+
+def get_executor():
+    """
+    Returns the thread of the process for rendering graphs in the
+    background. It is a single one as the rendering competes for the GIL
+    with the requests served by the process.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="graphing"
+            )
+        return _executor
+
+
+def _get_graph_key(token):
+    return "graphing:graph:{0}".format(token)
+
+
+def submit_graph(function, *args, graph_format="svg"):
+    """
+    Renders a graph with the function in the background, returning the
+    token for retrieving it (see get_graph).
+    """
+    token = uuid4().hex
+    cache.set(
+        _get_graph_key(token),
+        {"status": GRAPH_PENDING, "format": graph_format},
+        settings.GRAPHING_RESULTS_TIMEOUT
+    )
+    get_executor().submit(_render_graph, token, function, graph_format, *args)
+    return token
+
+
+def _render_graph(token, function, graph_format, *args):
+    """
+    Renders a graph and stores the result, to be run in a worker thread.
+    """
+    try:
+        result = {
+            "status": GRAPH_DONE, "format": graph_format,
+            "graph": function(*args, graph_format=graph_format)
+        }
+    except Exception:
+        # The details are logged, not exposed to the clients
+        logger.exception("Error rendering the graph %s", token)
+        result = {"status": GRAPH_ERROR, "format": graph_format}
+    finally:
+        # Worker threads open their own connections (i.e. for the dataset)
+        connections.close_all()
+    cache.set(_get_graph_key(token), result, settings.GRAPHING_RESULTS_TIMEOUT)
+
+
+def get_graph(token):
+    """
+    Returns the status of the graph of the token and - once done - the
+    graph itself, or None if the token is unknown or has expired.
+    """
+    return cache.get(_get_graph_key(token))
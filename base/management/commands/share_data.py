@@ -0,0 +1,63 @@
+from concurrent.futures import ThreadPoolExecutor
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils import timezone
+
+from base.models import DataSharingOutbox, NetworkNode
+
+
+def process_node_outbox(node, limit):
+    try:
+        return (node, node.process_outbox(limit=limit))
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Shares the Data queued in the outbox with the Network Nodes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Processes the outbox once and exits',
+        )
+
+        parser.add_argument(
+            '--interval',
+            type=float, default=5,
+            help='Seconds to wait between outbox processing rounds',
+        )
+
+        parser.add_argument(
+            '--limit',
+            type=int, default=500,
+            help='Maximum amount of entries to process per node and round',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            nodes = list(
+                NetworkNode.objects.filter(
+                    outbox__status=DataSharingOutbox.STATUS_PENDING,
+                    outbox__next_attempt__lte=timezone.now()
+                ).distinct()
+            )
+            if nodes:
+                # Nodes are processed concurrently
+                with ThreadPoolExecutor(max_workers=len(nodes)) as executor:
+                    results = executor.map(
+                        process_node_outbox, nodes,
+                        [options['limit']] * len(nodes)
+                    )
+                    for node, (shared, failed) in results:
+                        self.stdout.write(
+                            '{0}: {1} shared, {2} failed'.format(
+                                node, shared, failed
+                            )
+                        )
+            if options['once']:
+                break
+            time.sleep(options['interval'])
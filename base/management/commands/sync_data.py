@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from base.models import NetworkNode
+
+
+class Command(BaseCommand):
+    help = 'Requests the data changed in the Network Nodes since the last ' \
+        'synchronization'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--node',
+            type=int,
+            help='Synchronizes only with the node of the provided id',
+        )
+
+        parser.add_argument(
+            '--max-pages',
+            type=int,
+            help='Maximum amount of pages to request to each node',
+        )
+
+    def handle(self, *args, **options):
+        nodes = NetworkNode.objects.filter(
+            data_sync_is_enabled=True, user__isnull=False, unit__isnull=False
+        )
+        if options['node']:
+            nodes = nodes.filter(pk=options['node'])
+        for node in nodes:
+            received = node.sync_data(max_pages=options['max_pages'])
+            if received is False:
+                self.stdout.write(self.style.ERROR(
+                    '{0}: errors ocurred, check network error logs'
+                    .format(node)
+                ))
+            else:
+                self.stdout.write(self.style.SUCCESS(
+                    '{0}: {1} records received'.format(node, received)
+                ))
@@ -0,0 +1,36 @@
+# Generated by Django 4.0.1 on 2026-10-18 12:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data', '0018_alter_data_id'),
+        ('base', '0018_alter_externalclassifier_timeout'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataSharingOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.PositiveSmallIntegerField(choices=[(0, 'Pending'), (1, 'Dead')], default=0, verbose_name='Status')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Attempts')),
+                ('next_attempt', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Next Attempt')),
+                ('timestamp', models.DateTimeField(auto_now_add=True, verbose_name='Timestamp')),
+                ('data', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='data.data', verbose_name='Data')),
+                ('node', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='outbox', to='base.networknode', verbose_name='Network Node')),
+            ],
+            options={
+                'verbose_name': 'Data Sharing Outbox Entry',
+                'verbose_name_plural': 'Data Sharing Outbox',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='datasharingoutbox',
+            index=models.Index(fields=['node', 'status', 'next_attempt'], name='base_datash_node_id_c32796_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.0.1 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0019_datasharingoutbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='networknode',
+            name='endpoint_data_bulk',
+            field=models.CharField(default='/api/v1/data-bulk', max_length=100, verbose_name='Endpoint for Data (Bulk)'),
+        ),
+    ]
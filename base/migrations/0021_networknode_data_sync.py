@@ -0,0 +1,28 @@
+# Generated by Django 4.0.1 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0020_networknode_endpoint_data_bulk'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='networknode',
+            name='data_sync_is_enabled',
+            field=models.BooleanField(default=False, help_text='Periodically request the data changed in the node (see the sync_data command)', verbose_name='Data Synchronization - Is Enabled?'),
+        ),
+        migrations.AddField(
+            model_name='networknode',
+            name='data_sync_cursor',
+            field=models.CharField(blank=True, help_text='Position of the last data received from the node', max_length=200, null=True, verbose_name='Data Synchronization - Cursor'),
+        ),
+        migrations.AlterField(
+            model_name='networkerrorlog',
+            name='action',
+            field=models.PositiveSmallIntegerField(choices=[(0, 'Other'), (1, 'Classify'), (2, 'Share Data'), (3, 'Synchronize Data')], default=0, verbose_name='Action'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.0.1 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0021_networknode_data_sync'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='currentclassifier',
+            name='version',
+            field=models.CharField(blank=True, editable=False, help_text='Version of the classifier in the Classifier Store, renewed on every change', max_length=32, null=True, verbose_name='Version'),
+        ),
+    ]
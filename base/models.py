@@ -1,3 +1,6 @@
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import timedelta
+from functools import partial
 from itertools import combinations
 from numpy import mean
 from numpy import nan as np_nan
@@ -5,16 +8,18 @@ import numpy as np
 import matplotlib
 import matplotlib.pyplot as plt
 from matplotlib.colors import ListedColormap
-import requests
+from matplotlib.figure import Figure
 from scipy.special import comb
 from sklearn import metrics as sklearn_metrics
 from sklearn.compose import make_column_transformer
 from sklearn.pipeline import make_pipeline
 from sklearn.preprocessing import OrdinalEncoder
 from tempfile import TemporaryFile
+import time
+from uuid import uuid4
 
-from django.db import models
-from django.db.models.signals import post_save
+from django.db import connections, models, transaction
+from django.db.models.signals import post_delete, post_save
 from django.core.cache import cache
 from django.contrib.auth.models import AbstractUser
 from django.core.exceptions import ValidationError
@@ -27,7 +32,13 @@ from django_ai.supervised_learning.models import HGBTreeClassifier, SVC
 from rest_framework import status
 
 from data.models import Data
-from data.serializers import DataClassificationSerializer, DataShareSerializer
+from data.serializers import (
+    DataClassificationSerializer, DataShareSerializer, validate_shared_records
+)
+from data.signals import data_bulk_saved as data_bulk_saved_signal
+
+from . import classifier_store, fragment_cache, graphing
+from .network import get_session, reset_session
 
 
 matplotlib.use('agg')
@@ -150,8 +161,20 @@ class CurrentClassifier(models.Model):
         )
     )
 
+    version = models.CharField(
+        _("Version"),
+        max_length=32, blank=True, null=True, editable=False,
+        help_text=_(
+            "Version of the classifier in the Classifier Store, renewed "
+            "on every change"
+        )
+    )
+
     objects = CurrentClassifierManager()
 
+    # (version, instance) loaded in the process
+    _loaded = None
+
     class Meta:
         verbose_name = _("Current Classifier")
 
@@ -159,36 +182,68 @@ class CurrentClassifier(models.Model):
         return str(self.classifier)
 
     def save(self, *args, **kwargs):
+        # A new version makes every process rebuild it on its next get()
+        self.version = uuid4().hex
         super().save(*args, **kwargs)
-        self.update_cache()
 
     def delete(self, *args, **kwargs):
         super().delete(*args, **kwargs)
-        cache.set("CurrentClassifier", None)
+        CurrentClassifier._loaded = None
+        classifier_store.clear()
 
     @classmethod
     def get(cls):
-        return cache.get('CurrentClassifier', CurrentClassifier.set())
+        """
+        Returns the Current Classifier of the process. Only its version is
+        queried, it is (re)loaded - from the Classifier Store or built and
+        published if not there - only when the version has changed.
+        """
+        row = CurrentClassifier.objects.order_by('pk')\
+            .values_list('version').last()
+        if row is None:
+            cls._loaded = None
+            return None
+        if row[0] and cls._loaded and cls._loaded[0] == row[0]:
+            return cls._loaded[1]
+        instance = classifier_store.load(row[0]) if row[0] else None
+        if instance is None:
+            instance = cls._build()
+        if instance is not None:
+            cls._loaded = (instance.version, instance)
+        return instance
 
     @classmethod
-    def set(cls, instance=None):
-        if instance is None:
-            last_instance = CurrentClassifier.objects.last()
-            if not last_instance:
-                cache.set('CurrentClassifier', None)
-                return None
-            else:
-                instance = last_instance
+    def _build(cls):
+        """
+        Loads the Current Classifier from the database and publishes it in
+        the Classifier Store.
+        """
+        instance = CurrentClassifier.objects.last()
+        if not instance:
+            return None
+        instance.load_local_classifier()
+        if not instance.version:
+            instance.version = uuid4().hex
+            CurrentClassifier.objects.filter(pk=instance.pk)\
+                .update(version=instance.version)
+        classifier_store.dump(instance, instance.version)
+        return instance
+
+    @classmethod
+    def invalidate(cls, **filters):
+        """
+        Renews the version of the Current Classifier - if it matches the
+        filters - so it is rebuilt on the next get() of each process.
+        """
+        CurrentClassifier.objects.filter(**filters)\
+            .update(version=uuid4().hex)
+        fragment_cache.renew('classifier')
+
+    def load_local_classifier(self):
         # Trigger fk queries and property loading
-        local_classifier = instance.get_local_classifier()
+        local_classifier = self.get_local_classifier()
         if not hasattr(local_classifier, 'service_url'):
             local_classifier.get_engine_object()
-        #
-        cache.set('CurrentClassifier', instance)
-        return instance
-
-    def update_cache(self):
-        CurrentClassifier.set(instance=self)
 
     def get_local_classifier(self):
         if self.external:
@@ -205,9 +260,12 @@ class CurrentClassifier(models.Model):
                 result = local_classifier.predict(observations)
                 return (result['result'], result['prob'])
             else:
+                # The whole batch is predicted in one call to the engine
                 (res, scores) = \
                     local_classifier.predict(observations, include_scores=True)
-                results = ["POSITIVE" if r else "NEGATIVE" for r in res]
+                results = np.where(
+                    np.asarray(res, dtype=bool), "POSITIVE", "NEGATIVE"
+                ).tolist()
                 return (results, scores)
         return (None, None)
 
@@ -273,30 +331,84 @@ class CurrentClassifier(models.Model):
         else:
             return (results_list, scores_list)
 
-    def generate_graph(self, observations):
+    def generate_graph(self, observations, graph_format="svg"):
         technique = self.classifier._get_technique()
         if not isinstance(observations, list):
             observations = [observations]
         graphs = [
-            technique.generate_graph(observation)
+            technique.generate_graph(observation, graph_format=graph_format)
             for observation in observations
         ]
         return graphs
 
+    def submit_graph(self, observations, graph_format="svg"):
+        """
+        Renders the graphs of the observations in the background, returning
+        the tokens for retrieving them.
+        """
+        technique = self.classifier._get_technique()
+        if not isinstance(observations, list):
+            observations = [observations]
+        return [
+            graphing.submit_graph(
+                technique.generate_graph, observation,
+                graph_format=graph_format
+            )
+            for observation in observations
+        ]
+
     def _get_network_votes(self, observations):
+        """
+        Collects the votes of the local classifier and the network nodes.
+
+        Nodes are requested concurrently (bounded by
+        NETWORK_VOTING_MAX_WORKERS) while the local vote is being computed,
+        and their votes are awaited until NETWORK_VOTING_TIMEOUT seconds
+        after the requests were issued. Votes arriving later are dropped and
+        recorded as missing (None result and prob).
+        """
         votes = {}
-        local_vote = self.predict(observations)
-        votes["local ({})".format(settings.CHTUID)] = {
-            "result": local_vote[0], "prob": local_vote[1]
-        }
+        nodes = []
         if not self.network_voting == self.NETWORK_VOTING_DISABLED:
-            for node in \
-                    NetworkNode.objects.filter(classification_request=True):
-                try:
-                    votes[str(node)] = node.predict(observations)
-                except Exception:
-                    # Error logs are created by node.predict()
-                    pass
+            nodes = list(
+                NetworkNode.objects.filter(classification_request=True)
+            )
+        executor = None
+        if nodes:
+            executor = ThreadPoolExecutor(
+                max_workers=min(
+                    len(nodes), settings.NETWORK_VOTING_MAX_WORKERS
+                )
+            )
+        try:
+            if nodes:
+                deadline = \
+                    time.monotonic() + settings.NETWORK_VOTING_TIMEOUT
+                futures = {
+                    executor.submit(
+                        _get_node_vote, node, observations
+                    ): str(node)
+                    for node in nodes
+                }
+            local_vote = self.predict(observations)
+            votes["local ({})".format(settings.CHTUID)] = {
+                "result": local_vote[0], "prob": local_vote[1]
+            }
+            if nodes:
+                _, not_done = wait(
+                    futures, timeout=max(deadline - time.monotonic(), 0)
+                )
+                for future, node_name in futures.items():
+                    if future in not_done:
+                        votes[node_name] = {"result": None, "prob": None}
+                    elif not future.exception():
+                        votes[node_name] = future.result()
+                    # Otherwise, error logs are created by node.predict()
+        finally:
+            # Also if the local prediction fails, so pending requests are
+            # cancelled and the pool is released
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
         return votes
 
     def clean(self):
@@ -307,7 +419,8 @@ class CurrentClassifier(models.Model):
 
 
 class ExternalClassifier(models.Model):
-    _requests_client = requests
+    # Overrides the pooled session of the service if set (i.e. for testing)
+    _requests_client = None
 
     name = models.CharField(
         _("Name"),
@@ -372,21 +485,28 @@ class ExternalClassifier(models.Model):
 
     def save(self, *args, **kwargs):
         super().save(*args, **kwargs)
-        cc = CurrentClassifier.get()
-        if cc:
-            cc.update_cache()
+        CurrentClassifier.invalidate(external=self.pk)
+
+    def delete(self, *args, **kwargs):
+        reset_session(self)
+        return super().delete(*args, **kwargs)
 
     @property
     def is_inferred(self):
         return True
 
+    def _get_requests_client(self):
+        if self._requests_client:
+            return self._requests_client
+        return get_session(self)
+
     def predict(self, observations):
         if not isinstance(observations, list):
             observations = [observations]
         data = DataClassificationSerializer(observations, many=True).data
         url = self.service_url + self.endpoint_classify_dataset
         try:
-            response = self._requests_client.post(
+            response = self._get_requests_client().post(
                 url,
                 headers=self._get_auth_header(), timeout=self.timeout,
                 json={"dataset": data}
@@ -421,7 +541,7 @@ class ExternalClassifier(models.Model):
         )
         url = self.service_url + self.endpoint_classify_dataset
         try:
-            response = self._requests_client.post(
+            response = self._get_requests_client().post(
                 url, headers=self._get_auth_header(), timeout=self.timeout,
                 json={"dataset": data}
             )
@@ -450,7 +570,7 @@ class ExternalClassifier(models.Model):
     def update_metadata(self, save=True):
         url = self.service_url + self.endpoint_classify_dataset
         try:
-            response = self._requests_client.get(
+            response = self._get_requests_client().get(
                 url, headers=self._get_auth_header(), timeout=self.timeout
             )
             if status.is_success(response.status_code):
@@ -547,6 +667,11 @@ class NetworkNode(ExternalClassifier):
         max_length=100,
         default='/api/v1/data'
     )
+    endpoint_data_bulk = models.CharField(
+        _("Endpoint for Data (Bulk)"),
+        max_length=100,
+        default='/api/v1/data-bulk'
+    )
     data_sharing_is_enabled = models.BooleanField(
         _("Data Sharing - Is Enabled?"),
         default=True
@@ -561,6 +686,17 @@ class NetworkNode(ExternalClassifier):
         _("Request Classification Service"),
         default=True
     )
+    data_sync_is_enabled = models.BooleanField(
+        _("Data Synchronization - Is Enabled?"),
+        default=False,
+        help_text=_("Periodically request the data changed in the node (see "
+                    "the sync_data command)")
+    )
+    data_sync_cursor = models.CharField(
+        _("Data Synchronization - Cursor"),
+        max_length=200, blank=True, null=True,
+        help_text=_("Position of the last data received from the node")
+    )
 
     class Meta:
         verbose_name = "Network Node"
@@ -569,12 +705,19 @@ class NetworkNode(ExternalClassifier):
     def __str__(self):
         return "{} ({})".format(self.name, self.metadata.get("chtuid", "-"))
 
+    def clean(self):
+        super().clean()
+        if self.data_sync_is_enabled and not (self.user and self.unit):
+            raise ValidationError(
+                _("User and Unit must be set for Data Synchronization")
+            )
+
     def share_data(self, data):
         url = self.service_url + self.endpoint_data
         if isinstance(data, models.Model):
             data = DataShareSerializer(instance=data).data
         try:
-            response = self._requests_client.put(
+            response = self._get_requests_client().put(
                 url, data=data,
                 headers=self._get_auth_header(),
                 timeout=self.timeout
@@ -594,16 +737,305 @@ class NetworkNode(ExternalClassifier):
                 )
             return False
 
+    def share_data_bulk(self, data):
+        """
+        Shares a list of records in one request, returns a dict with the
+        success of each record by uuid or False if the request failed.
+        Records are shared one by one with nodes which do not provide the
+        bulk endpoint (previous versions).
+        """
+        url = self.service_url + self.endpoint_data_bulk
+        data = [
+            DataShareSerializer(instance=record).data
+            if isinstance(record, models.Model) else record
+            for record in data
+        ]
+        try:
+            response = self._get_requests_client().put(
+                url, json=data,
+                headers=self._get_auth_header(),
+                timeout=self.timeout
+            )
+            if response.status_code in (status.HTTP_404_NOT_FOUND,
+                                        status.HTTP_405_METHOD_NOT_ALLOWED):
+                response_results = None
+            elif not status.is_success(response.status_code):
+                self.errors_log.create(
+                    action=NetworkErrorLog.ACTION_SHARE_DATA, url=url,
+                    status_code=response.status_code, message=response.content
+                )
+                return False
+            else:
+                response_results = response.json()
+                if not isinstance(response_results, list) or not all(
+                        isinstance(result, dict)
+                        and isinstance(result.get('uuid', None), str)
+                        and isinstance(result.get('status', None), int)
+                        for result in response_results):
+                    raise ValueError(
+                        "Unexpected response: {0}".format(response.content)
+                    )
+        except Exception as e:
+            self.errors_log.create(
+                    action=NetworkErrorLog.ACTION_SHARE_DATA, url=url,
+                    message=e
+                )
+            return False
+        if response_results is None:
+            return {
+                str(record['uuid']): self.share_data(record)
+                for record in data
+            }
+        results = {}
+        for result in response_results:
+            results[result['uuid']] = status.is_success(result['status'])
+            if not results[result['uuid']]:
+                self.errors_log.create(
+                    action=NetworkErrorLog.ACTION_SHARE_DATA, url=url,
+                    status_code=result['status'],
+                    message="{0}: {1}".format(
+                        result['uuid'], result.get('errors', None)
+                    )
+                )
+        return results
+
+    def sync_data(self, max_pages=None):
+        """
+        Requests the data changed in the node since the last synchronization
+        and creates or updates it locally (under the node's user and unit),
+        storing the cursor of the node after each page. Returns the amount
+        of records received or False if a request failed.
+        """
+        url = self.service_url + self.endpoint_data
+        received, pages = 0, 0
+        while max_pages is None or pages < max_pages:
+            try:
+                response = self._get_requests_client().get(
+                    url, params={'sync': self.data_sync_cursor or ''},
+                    headers=self._get_auth_header(),
+                    timeout=self.timeout
+                )
+                if not status.is_success(response.status_code):
+                    self.errors_log.create(
+                        action=NetworkErrorLog.ACTION_SYNC_DATA, url=url,
+                        status_code=response.status_code,
+                        message=response.content
+                    )
+                    return False
+                page = response.json()
+                if not isinstance(page, dict) or \
+                        not isinstance(page.get('results', None), list) or \
+                        'cursor' not in page or 'more' not in page:
+                    raise ValueError(
+                        "Unexpected response (the node may not support "
+                        "synchronization): {0}".format(response.content)
+                    )
+            except Exception as e:
+                self.errors_log.create(
+                        action=NetworkErrorLog.ACTION_SYNC_DATA, url=url,
+                        message=e
+                    )
+                return False
+            results, records = validate_shared_records(page['results'])
+            for result in results:
+                if result['status'] == status.HTTP_400_BAD_REQUEST:
+                    self.errors_log.create(
+                        action=NetworkErrorLog.ACTION_SYNC_DATA, url=url,
+                        status_code=result['status'],
+                        message="{0}: {1}".format(
+                            result['uuid'], result['errors']
+                        )
+                    )
+            Data.bulk_upsert(records, self.user, self.unit)
+            received += len(page['results'])
+            pages += 1
+            if page['cursor']:
+                self.data_sync_cursor = page['cursor']
+                NetworkNode.objects.filter(pk=self.pk).update(
+                    data_sync_cursor=self.data_sync_cursor
+                )
+            if not page['more']:
+                break
+        return received
+
+    def process_outbox(self, limit=None):
+        """
+        Shares the Data queued in the outbox of the node which is due,
+        returns the amount of records shared and failed.
+
+        Records are sent in batches of DATA_SHARING_OUTBOX_BATCH_SIZE, which
+        are held until they are full or their oldest record has waited
+        DATA_SHARING_OUTBOX_BATCH_LINGER seconds. Batches are sent
+        concurrently (up to DATA_SHARING_OUTBOX_NODE_CONCURRENCY), failed
+        records are retried with an exponential backoff until
+        DATA_SHARING_OUTBOX_MAX_ATTEMPTS, after which they are marked as dead.
+
+        The due entries are claimed before sending them - leased for
+        DATA_SHARING_OUTBOX_LEASE seconds - so concurrent workers do not
+        process the same ones.
+        """
+        entries = self.claim_outbox(limit=limit)
+        # Coalesce the entries of the same record, its current state is sent
+        entries_by_data = {}
+        for entry in entries:
+            entries_by_data.setdefault(entry.data_id, []).append(entry)
+        if not entries_by_data:
+            return (0, 0)
+        batch_size = settings.DATA_SHARING_OUTBOX_BATCH_SIZE
+        datas = [
+            data_entries[0].data for data_entries in entries_by_data.values()
+        ]
+        batches = [
+            datas[i:i + batch_size] for i in range(0, len(datas), batch_size)
+        ]
+        with ThreadPoolExecutor(
+                max_workers=settings.DATA_SHARING_OUTBOX_NODE_CONCURRENCY
+                ) as executor:
+            results = {}
+            for batch, batch_results in zip(batches, executor.map(
+                    partial(_share_node_data, self), batches)):
+                for data in batch:
+                    results[data.id] = batch_results and \
+                        batch_results.get(str(data.uuid), False)
+        shared, failed = [], []
+        for data_id, data_entries in entries_by_data.items():
+            if results[data_id]:
+                shared.extend(data_entries)
+            else:
+                failed.extend(data_entries)
+        DataSharingOutbox.objects.filter(
+            id__in=[entry.id for entry in shared]
+        ).delete()
+        for entry in failed:
+            entry.register_failed_attempt()
+        failed_amount = list(results.values()).count(False)
+        return (len(results) - failed_amount, failed_amount)
+
+    def claim_outbox(self, limit=None):
+        """
+        Claims the due entries of the outbox of the node, leasing them by
+        postponing their next attempt, and returns them (with their Data).
+        No entries are claimed while the batch is held (see
+        process_outbox).
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            # Entries locked by other workers are being claimed by them
+            entries = self.outbox\
+                .select_for_update(skip_locked=True)\
+                .filter(status=DataSharingOutbox.STATUS_PENDING,
+                        next_attempt__lte=now)\
+                .order_by('id')
+            if limit:
+                entries = entries[:limit]
+            entries = list(entries.values_list('id', 'data_id', 'timestamp'))
+            if not entries:
+                return []
+            records = len(set(entry[1] for entry in entries))
+            if records < settings.DATA_SHARING_OUTBOX_BATCH_SIZE and \
+                    now - entries[0][2] < timedelta(
+                        seconds=settings.DATA_SHARING_OUTBOX_BATCH_LINGER):
+                return []
+            ids = [entry[0] for entry in entries]
+            DataSharingOutbox.objects.filter(id__in=ids).update(
+                next_attempt=now + timedelta(
+                    seconds=settings.DATA_SHARING_OUTBOX_LEASE
+                )
+            )
+        return list(
+            DataSharingOutbox.objects.filter(id__in=ids)
+            .select_related('data').order_by('id')
+        )
+
+
+def _share_node_data(node, data):
+    """
+    Shares a batch of data with the node, to be run in a worker thread.
+    """
+    try:
+        return node.share_data_bulk(data)
+    finally:
+        connections.close_all()
+
+
+class DataSharingOutbox(models.Model):
+    """
+    Queue of Data to be shared with the Network Nodes
+    """
+    STATUS_PENDING = 0
+    STATUS_DEAD = 1
+
+    STATUS_CHOICES = (
+        (STATUS_PENDING, _("Pending")),
+        (STATUS_DEAD, _("Dead")),
+    )
+
+    node = models.ForeignKey(
+        "base.NetworkNode",
+        on_delete=models.CASCADE,
+        verbose_name=_("Network Node"),
+        related_name="outbox"
+    )
+    data = models.ForeignKey(
+        "data.Data",
+        on_delete=models.CASCADE,
+        verbose_name=_("Data"),
+        related_name="+"
+    )
+    status = models.PositiveSmallIntegerField(
+        _("Status"),
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING
+    )
+    attempts = models.PositiveSmallIntegerField(
+        _("Attempts"),
+        default=0
+    )
+    next_attempt = models.DateTimeField(
+        _("Next Attempt"),
+        default=timezone.now
+    )
+    timestamp = models.DateTimeField(
+        _("Timestamp"),
+        auto_now_add=True
+    )
+
+    class Meta:
+        verbose_name = _("Data Sharing Outbox Entry")
+        verbose_name_plural = _("Data Sharing Outbox")
+        indexes = [
+            models.Index(fields=['node', 'status', 'next_attempt']),
+        ]
+
+    def __str__(self):
+        return "{0} -> {1} | {2}".format(
+            self.data_id, self.node_id, self.get_status_display()
+        )
+
+    def register_failed_attempt(self, save=True):
+        self.attempts += 1
+        if self.attempts >= settings.DATA_SHARING_OUTBOX_MAX_ATTEMPTS:
+            self.status = self.STATUS_DEAD
+        else:
+            self.next_attempt = timezone.now() + timedelta(
+                seconds=settings.DATA_SHARING_OUTBOX_RETRY_DELAY *
+                2 ** (self.attempts - 1)
+            )
+        if save:
+            self.save(update_fields=['attempts', 'status', 'next_attempt'])
+
 
 class NetworkErrorLog(models.Model):
     ACTION_OTHER = 0
     ACTION_CLASSIFY = 1
     ACTION_SHARE_DATA = 2
+    ACTION_SYNC_DATA = 3
 
     ACTION_CHOICES = (
         (ACTION_OTHER, _("Other")),
         (ACTION_CLASSIFY, _("Classify")),
-        (ACTION_SHARE_DATA, _("Share Data"))
+        (ACTION_SHARE_DATA, _("Share Data")),
+        (ACTION_SYNC_DATA, _("Synchronize Data")),
     )
 
     timestamp = models.DateTimeField(
@@ -643,27 +1075,72 @@ class NetworkErrorLog(models.Model):
         )
 
 
-def data_saved(sender, instance, **kwargs):
-    nodes = NetworkNode.objects\
-        .filter(data_sharing_is_enabled=True).exclude(unit=instance.unit)
+def queue_data_sharing(instances):
+    """
+    Queues the Data for sharing with the Network Nodes, the outbox is
+    processed by the ``share_data`` command.
+    """
+    nodes = NetworkNode.objects.filter(data_sharing_is_enabled=True)
+    entries = []
     for node in nodes:
-        if node.data_sharing_mode == node.DATA_SHARING_MODE_ON_UPDATE:
-            node.share_data(instance)
-        else:  # node.data_sharing_mode == node.DATA_SHARING_MODE_ON_FINISHED:
-            if instance.is_finished:
-                node.share_data(instance)
+        for instance in instances:
+            if node.unit_id and node.unit_id == instance.unit_id:
+                continue
+            if node.data_sharing_mode == node.DATA_SHARING_MODE_ON_UPDATE \
+                    or instance.is_finished:
+                entries.append(DataSharingOutbox(node=node, data=instance))
+    if entries:
+        DataSharingOutbox.objects.bulk_create(entries)
+
+
+def data_saved(sender, instance, **kwargs):
+    queue_data_sharing([instance])
+
+
+def data_bulk_saved(sender, instances, **kwargs):
+    queue_data_sharing(instances)
 
 
 post_save.connect(data_saved, sender='data.Data')
+data_bulk_saved_signal.connect(data_bulk_saved, sender=Data)
+
+
+def renew_classifier_fragments(sender, **kwargs):
+    fragment_cache.renew('classifier')
+
+
+def renew_units_fragments(sender, **kwargs):
+    fragment_cache.renew('units')
+
+
+# Saving the classifiers (and the nodes) renews the version of the Current
+# Classifier (see CurrentClassifier.invalidate)
+post_save.connect(renew_classifier_fragments, sender=CurrentClassifier)
+post_delete.connect(renew_classifier_fragments, sender=CurrentClassifier)
+post_delete.connect(renew_classifier_fragments, sender=ExternalClassifier)
+post_delete.connect(renew_classifier_fragments, sender=NetworkNode)
+post_save.connect(renew_units_fragments, sender='units.Unit')
+post_delete.connect(renew_units_fragments, sender='units.Unit')
+post_save.connect(renew_units_fragments, sender=User)
+post_delete.connect(renew_units_fragments, sender=User)
+
+
+def _get_node_vote(node, observations):
+    """
+    Requests the vote of a node, to be run in a worker thread.
+    """
+    try:
+        return node.predict(observations)
+    finally:
+        # Worker threads open their own connections (i.e. for the error logs)
+        connections.close_all()
 
 
 class CovidHTMixin:
 
     def save(self, *args, **kwargs):
         super().save(*args, **kwargs)
-        cc = CurrentClassifier.get()
-        if cc:
-            cc.update_cache()
+        CurrentClassifier.invalidate(classifier=self.pk)
 
     def _get_data_queryset(self):
         qs = super()._get_data_queryset()
@@ -705,22 +1182,24 @@ class CovidHTMixin:
             timezone.now().strftime('%Y-%m-%d %H:%M:%S')
         if save:
             self.save()
+        if settings.GRAPHING:
+            # Precompute the graphing context of the new engine
+            self.get_graphing_context()
         return eo
 
-    def generate_graph(self, observation):  # pragma: no cover
+    def _get_graphing_columns(self, fields=None):
         """
-        Based on https://scikit-learn.org/stable/auto_examples/classification/plot_classifier_comparison.html
+        Returns the indexes of the columns (in the observations and the
+        dataset) of the GRAPHING_FIELDS - restricted to the given ones -
+        and the offset of the columns.
         """
         fields_to_graph = settings.GRAPHING_FIELDS
-        fields_available_obs = [
-            f for f, v in observation.items() if v is not None
-        ]
         fields_supported = self._get_data_learning_fields_supported()
         fields_na = self._get_data_learning_fields_na()
 
         cols = [
             c for c in fields_supported
-            if c in fields_available_obs and c in fields_to_graph
+            if (fields is None or c in fields) and c in fields_to_graph
             and c not in fields_na
         ]
         cols_indexes = [
@@ -729,119 +1208,207 @@ class CovidHTMixin:
         cols_offset = 0
         if self.cift_is_enabled:
             cols_offset = self._get_cift_offset()
-        cols_indexes = [ci + cols_offset for ci in cols_indexes]
+        return ([ci + cols_offset for ci in cols_indexes], cols_offset)
 
-        obs = self._observation_dict_to_list(observation)
+    def get_graphing_context(self):
+        """
+        Returns what is needed from the dataset for graphing - the ranges
+        of its columns, a sample for the overlay (see
+        GRAPHING_DATASET_MAX_POINTS) and the density of each pair of fields
+        - which is computed once per trained engine and kept in the cache.
+        """
+        key = graphing.get_cache_key(
+            "context", self.pk, self.engine_object_timestamp
+        )
+        context = cache.get(key)
+        if context is None:
+            data = np.array(self.get_data())
+            if settings.CHTUID_USE_IN_CLASSIFICATION:
+                data = np.concatenate(
+                    (data[:, :1], data[:, 1:].astype('float')), axis=1)
+            else:
+                data = data.astype('float')
+            targets = np.array(self.get_targets())
+            ranges = graphing.get_columns_ranges(data)
+            sample = graphing.sample_dataset(
+                targets, settings.GRAPHING_DATASET_MAX_POINTS
+            )
+            cols_indexes, _ = self._get_graphing_columns()
+            context = {
+                "ranges": ranges,
+                "data": data[sample],
+                "targets": targets[sample],
+                "densities": graphing.get_pairs_densities(
+                    data, targets, ranges, combinations(cols_indexes, 2),
+                    settings.GRAPHING_JSON_BINS
+                ),
+            }
+            cache.set(key, context, settings.GRAPHING_CACHE_TIMEOUT)
+        return context
 
-        data = np.array(self.get_data())
-        if settings.CHTUID_USE_IN_CLASSIFICATION:
-            data = np.concatenate(
-                (data[:, :1], data[:, 1:].astype('float')), axis=1)
-        else:
-            data = data.astype('float')
+    def _get_graphing_mesh(self, obs, pair, axis, ranges):
+        """
+        Returns the mesh of the plane of the pair and the Conditional
+        Decision Function evaluated on it. Evaluations are cached and
+        reused for observations whose fixed coordinates fall in the same
+        buckets (see GRAPHING_MESH_BUCKETS).
+        """
+        axis_x_min, axis_x_max, axis_y_min, axis_y_max = axis
+        mesh_steps = settings.GRAPHING_MESH_STEPS
+        mesh_step_x = (axis_x_max - axis_x_min) / mesh_steps
+        mesh_step_y = (axis_y_max - axis_y_min) / mesh_steps
+
+        xx, yy = np.meshgrid(
+            np.arange(axis_x_min, axis_x_max, mesh_step_x),
+            np.arange(axis_y_min, axis_y_max, mesh_step_y)
+        )
 
-        targets = self.get_targets()
+        obs = graphing.quantize_observation(
+            obs, pair, ranges, settings.GRAPHING_MESH_BUCKETS
+        )
+        key = graphing.get_cache_key(
+            "mesh", self.pk, self.engine_object_timestamp, pair, axis,
+            mesh_steps, obs
+        )
+        Z = cache.get(key)
+        if Z is None:
+            xx_ravel, yy_ravel = xx.ravel(), yy.ravel()
+            cols_for_stack = []
+            for i in range(0, len(obs)):
+                if i == pair[0]:
+                    cols_for_stack.append(xx_ravel)
+                elif i == pair[1]:
+                    cols_for_stack.append(yy_ravel)
+                else:
+                    cols_for_stack.append(
+                        np.full(xx_ravel.shape, obs[i])
+                    )
+            grid = np.column_stack((*cols_for_stack, ))
 
-        clf = self.get_engine_object()
+            if not self.SUPPORTS_NA:
+                grid = graphing.impute_grid(
+                    self.get_data_imputer_object(), grid, pair
+                )
 
-        n_graphs = comb(len(cols), 2)
-        n_graphs_rows = int(np.ceil(n_graphs / 2))
+            clf = self.get_engine_object()
+            if hasattr(clf, "decision_function"):
+                Z = clf.decision_function(grid)
+            else:
+                Z = clf.predict_proba(grid)[:, 1]
+            Z = Z.reshape(xx.shape)
+            cache.set(key, Z, settings.GRAPHING_CACHE_TIMEOUT)
+        return (xx, yy, Z)
 
-        cm = plt.cm.bwr
-        cm_bright = ListedColormap(['#0000FF', '#FF0000'])
+    def _get_graphing_planes(self, observation):
+        """
+        Returns the planes to be graphed for the observation: the pairwise
+        combinations of the GRAPHING_FIELDS available in it, with their
+        axis and - if enabled - the Conditional Decision Function.
+        """
+        fields_available_obs = [
+            f for f, v in observation.items() if v is not None
+        ]
+        cols_indexes, cols_offset = \
+            self._get_graphing_columns(fields_available_obs)
 
-        fig = plt.figure()
-        gridspec = fig.add_gridspec(n_graphs_rows, (2 if n_graphs > 1 else 1))
+        obs = self._observation_dict_to_list(observation)
+        ranges = self.get_graphing_context()["ranges"]
 
+        planes = []
         for graph_index, pair in enumerate(combinations(cols_indexes, 2)):
-            obs_x = np.float(obs[pair[0]])
-            x_min = np.fmin(np.nanmin(data[:, pair[0]]), obs_x)
-            x_max = np.fmax(np.nanmax(data[:, pair[0]]), obs_x)
+            obs_x = float(obs[pair[0]])
+            x_min, x_max = ranges[pair[0]] or (obs_x, obs_x)
+            x_min, x_max = min(x_min, obs_x), max(x_max, obs_x)
             x_rec = x_max - x_min
 
-            obs_y = np.float(obs[pair[1]])
-            y_min = np.fmin(np.nanmin(data[:, pair[1]]), obs_y)
-            y_max = np.fmax(np.nanmax(data[:, pair[1]]), obs_y)
+            obs_y = float(obs[pair[1]])
+            y_min, y_max = ranges[pair[1]] or (obs_y, obs_y)
+            y_min, y_max = min(y_min, obs_y), max(y_max, obs_y)
             y_rec = y_max - y_min
 
             if y_rec > 0 and x_rec > 0:
-                ax = fig.add_subplot(
-                    gridspec[graph_index],
-                    sharex=None, sharey=None
-                )
                 margin_x = x_rec / 20
                 margin_y = y_rec / 3
-                axis_x_min, axis_x_max = x_min - margin_x, x_max + margin_x
-                axis_y_min, axis_y_max = y_min - margin_y, y_max + margin_y
-
+                axis = (
+                    x_min - margin_x, x_max + margin_x,
+                    y_min - margin_y, y_max + margin_y
+                )
+                plane = {
+                    "index": graph_index,
+                    "pair": pair,
+                    "fields": [
+                        self._get_field_name_by_index(
+                            col - cols_offset, supported=True)
+                        for col in pair
+                    ],
+                    "axis": axis,
+                    "observation": (obs_x, obs_y),
+                    "mesh": None,
+                }
                 if settings.GRAPHING_COND_DEC_FUNCTION:
-                    mesh_steps = settings.GRAPHING_MESH_STEPS
-                    mesh_step_x = (axis_x_max - axis_x_min) / mesh_steps
-                    mesh_step_y = (axis_y_max - axis_y_min) / mesh_steps
+                    plane["mesh"] = \
+                        self._get_graphing_mesh(obs, pair, axis, ranges)
+                planes.append(plane)
+        return (planes, comb(len(cols_indexes), 2))
 
-                    xx, yy = np.meshgrid(
-                        np.arange(axis_x_min, axis_x_max, mesh_step_x),
-                        np.arange(axis_y_min, axis_y_max, mesh_step_y)
-                    )
+    def generate_graph(self, observation,
+                       graph_format="svg"):  # pragma: no cover
+        """
+        Based on https://scikit-learn.org/stable/auto_examples/classification/plot_classifier_comparison.html
+        """
+        planes, n_graphs = self._get_graphing_planes(observation)
+        context = self.get_graphing_context()
+        # Sample of the dataset for the overlay
+        data, targets = context["data"], context["targets"]
 
-                    xx_ravel, yy_ravel = xx.ravel(), yy.ravel()
-                    cols_for_stack = []
-                    for i in range(0, len(obs)):
-                        if i == pair[0]:
-                            cols_for_stack.append(xx_ravel)
-                        elif i == pair[1]:
-                            cols_for_stack.append(yy_ravel)
-                        else:
-                            cols_for_stack.append(
-                                np.full(xx_ravel.shape, obs[i])
-                            )
-                    grid = np.column_stack((*cols_for_stack, ))
-
-                    if not self.SUPPORTS_NA:
-                        grid_imputed = []
-                        imputer = self.get_data_imputer_object()
-                        for point in grid:
-                            if not all(point):
-                                point = imputer.impute_row(list(point))
-                            grid_imputed.append(point)
-                        grid = grid_imputed
-
-                    if hasattr(clf, "decision_function"):
-                        Z = clf.decision_function(grid)
-                    else:
-                        Z = clf.predict_proba(grid)[:, 1]
-                    Z = Z.reshape(xx.shape)
-
-                    ax.contourf(xx, yy, Z, cmap=cm, alpha=.6, vmax=5, vmin=-5)
-
-                if settings.GRAPHING_DATASET:
-                    ax.scatter(data[:, pair[0]], data[:, pair[1]],
-                               c=targets, cmap=cm_bright,
-                               edgecolors=None, alpha=0.6)
-
-                # Plot the observation
-                ax.axvline(obs[pair[0]], c="green")
-                ax.axhline(obs[pair[1]], c="green")
-                ax.scatter(obs[pair[0]], obs[pair[1]], c="green",
-                           alpha=1, edgecolors='k')
-
-                # Set lims, ticks and labels
-                ax.tick_params(axis='both', which='major',
-                               labelsize=4, pad=1)
-                ax.set_xlabel(
-                    self._get_field_name_by_index(
-                        pair[0] - cols_offset, supported=True),
-                    labelpad=0, size=6)
-                ax.set_ylabel(
-                    self._get_field_name_by_index(
-                        pair[1] - cols_offset, supported=True),
-                    labelpad=0, size=6)
+        if graph_format == "json":
+            return graphing.planes_to_json(planes, context["densities"])
+
+        n_graphs_rows = int(np.ceil(n_graphs / 2))
+
+        cm = plt.cm.bwr
+        cm_bright = ListedColormap(['#0000FF', '#FF0000'])
+
+        # Not managed by pyplot, as they are rendered in worker threads
+        fig = Figure()
+        gridspec = fig.add_gridspec(n_graphs_rows, (2 if n_graphs > 1 else 1))
+
+        for plane in planes:
+            pair = plane["pair"]
+            obs_x, obs_y = plane["observation"]
+            ax = fig.add_subplot(
+                gridspec[plane["index"]],
+                sharex=None, sharey=None
+            )
+
+            if plane["mesh"]:
+                xx, yy, Z = plane["mesh"]
+                ax.contourf(xx, yy, Z, cmap=cm, alpha=.6, vmax=5, vmin=-5)
+
+            if settings.GRAPHING_DATASET:
+                ax.scatter(data[:, pair[0]], data[:, pair[1]],
+                           c=targets, cmap=cm_bright,
+                           edgecolors=None, alpha=0.6)
+
+            # Plot the observation
+            ax.axvline(obs_x, c="green")
+            ax.axhline(obs_y, c="green")
+            ax.scatter(obs_x, obs_y, c="green",
+                       alpha=1, edgecolors='k')
+
+            # Set lims, ticks and labels
+            ax.tick_params(axis='both', which='major',
+                           labelsize=4, pad=1)
+            ax.set_xlabel(plane["fields"][0], labelpad=0, size=6)
+            ax.set_ylabel(plane["fields"][1], labelpad=0, size=6)
 
         fig.tight_layout()
-        with TemporaryFile(suffix=".svg") as tmpfile:
-            fig.savefig(tmpfile, format="svg")
+        with TemporaryFile(suffix=".{0}".format(graph_format)) as tmpfile:
+            fig.savefig(tmpfile, format=graph_format)
             tmpfile.seek(0)
-            return tmpfile.read().decode('utf-8')
+            if graph_format == "svg":
+                return tmpfile.read().decode('utf-8')
+            return tmpfile.read()
 
 
 class DecisionTree(CovidHTMixin, HGBTreeClassifier):
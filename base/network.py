@@ -0,0 +1,67 @@
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from django.conf import settings
+
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def _get_session_fingerprint(service):
+    return (service.service_url, service.remote_user_token)
+
+
+def build_session():
+    """
+    Returns a requests' Session with keep-alive connection pooling and
+    retries with backoff for idempotent requests.
+    """
+    retries = Retry(
+        total=settings.NETWORK_RETRIES,
+        backoff_factor=settings.NETWORK_RETRIES_BACKOFF_FACTOR,
+        status_forcelist=(502, 503, 504),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=settings.NETWORK_POOL_CONNECTIONS,
+        pool_maxsize=settings.NETWORK_POOL_MAXSIZE,
+        max_retries=retries,
+    )
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_session(service):
+    """
+    Returns the pooled session of the process for an External Classifier or
+    Network Node, creating it if not present or if its Service URL or Remote
+    User Token has changed.
+    """
+    if service.pk is None:
+        return build_session()
+    fingerprint = _get_session_fingerprint(service)
+    with _sessions_lock:
+        entry = _sessions.get(service.pk, None)
+        if entry and entry[0] == fingerprint:
+            return entry[1]
+        if entry:
+            entry[1].close()
+        session = build_session()
+        _sessions[service.pk] = (fingerprint, session)
+        return session
+
+
+def reset_session(service):
+    """
+    Closes and discards the pooled session of the service, if any.
+    """
+    with _sessions_lock:
+        entry = _sessions.pop(service.pk, None)
+    if entry:
+        entry[1].close()
@@ -1,16 +1,25 @@
 from collections.abc import Iterable, Mapping
 from copy import deepcopy
 from decimal import Decimal
+from io import StringIO
 from itertools import zip_longest
 import numpy as np
+import os
 import random
-from unittest.mock import patch
+import tempfile
+import time
+from unittest.mock import Mock, patch
 from unittest import TestCase
+from uuid import uuid4
 
 from django.conf import settings
-from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.db import connection
 from django.urls import reverse
-from django.test import Client, SimpleTestCase
+from django.test import Client, SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 
 from rest_framework.authtoken.models import Token
 from rest_framework.response import Response
@@ -20,9 +29,10 @@ from data.utils import trunc_normal
 from data.models import Data
 from units.models import Unit
 
+from . import classifier_store, fragment_cache, graphing
 from .metrics import specificity_score
-from .models import (CurrentClassifier, DecisionTree, ExternalClassifier,
-                     NetworkErrorLog, NetworkNode, User,)
+from .models import (CurrentClassifier, DataSharingOutbox, DecisionTree,
+                     ExternalClassifier, NetworkErrorLog, NetworkNode, User,)
 
 
 # BIG thanks to https://stackoverflow.com/a/58275486
@@ -74,6 +84,9 @@ def assert_deep(instance: TestCase, method, first, second, *args, path=tuple(),
     return method(first, second, *args, **kwargs) 
 
 
+@override_settings(CACHES={'default': {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+}})
 class TestBase(SimpleTestCase):
     databases = "__all__"
 
@@ -230,6 +243,46 @@ class TestBase(SimpleTestCase):
                             ('<button class="btn waves-effect waves-light '
                              'blue darken-3" type="submit" name="action">'))
 
+    def test_fragment_cache(self):
+        _, _ = CurrentClassifier.objects.get_or_create(
+            classifier=self.classifier
+        )
+        version = fragment_cache.get_version('data', 'classifier')
+        self.assertEqual(
+            fragment_cache.get_version('data', 'classifier'), version
+        )
+        fragment_cache.renew('data')
+        self.assertNotEqual(
+            fragment_cache.get_version('data', 'classifier'), version
+        )
+        # Saving the Data and the classifiers renews the versions
+        version = fragment_cache.get_version('data')
+        data = Data.objects.create(user=self.user, unit=self.unit, rbc=3)
+        self.assertNotEqual(fragment_cache.get_version('data'), version)
+        version = fragment_cache.get_version('data')
+        data.delete()
+        self.assertNotEqual(fragment_cache.get_version('data'), version)
+        version = fragment_cache.get_version('classifier')
+        self.node_1.save()
+        self.assertNotEqual(fragment_cache.get_version('classifier'), version)
+        version = fragment_cache.get_version('units')
+        self.unit.save()
+        self.assertNotEqual(fragment_cache.get_version('units'), version)
+        # Cached fragments of the home page are not queried
+        response = self.client.get(reverse("base:home"))
+        self.assertEqual(response.status_code, 200)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("base:home"))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([
+            query for query in queries.captured_queries
+            if "currentclassifier" in query['sql']
+            or "networknode" in query['sql']
+        ])
+        CurrentClassifier.objects.all().delete()
+        response = self.client.get(reverse("base:home"))
+        self.assertContains(response, "No Current Classifier")
+
     def test_classification(self):
         with self.settings(GRAPHING=False):
             self.classifier.perform_inference()
@@ -298,7 +351,7 @@ class TestBase(SimpleTestCase):
 
         with patch.object(ExternalClassifier,
                           '_requests_client', drf_request_client):
-            with patch.object(CurrentClassifier.objects, 'last',
+            with patch.object(CurrentClassifier, 'get',
                               return_value=None):
                 response = self.client.post(reverse("base:home"), data)
 
@@ -518,10 +571,58 @@ class TestBase(SimpleTestCase):
             self.assertEqual(p1, ["POSITIVE"])
             assert_deep(self, self.assertAlmostEqual, s1, [0.6300912038351191])
 
+    def test_network_votes_deadline(self):
+        cc = deepcopy(self.current_classifier)
+        cc.network_voting = cc.NETWORK_VOTING_MAJORITY
+        observation = {
+            'rbc': 3,
+            'wbc': 5,
+            'plt': 150,
+            'neut': 0.5,
+            'lymp_Upercentage_Rwbc': 10,
+            'mono_Upercentage_Rwbc': 10,
+        }
+
+        def slow_predict(node, observations):
+            time.sleep(2 if node.name == self.node_2.name else 0.5)
+            return {'result': ['NEGATIVE'], 'prob': [0.9]}
+
+        self.node_1.metadata = {}
+        self.node_1.save()
+        self.node_2.metadata = {}
+        self.node_2.save()
+        with self.settings(NETWORK_VOTING_TIMEOUT=1):
+            with patch.object(NetworkNode, 'predict', autospec=True,
+                              side_effect=slow_predict):
+                start = time.monotonic()
+                votes = cc._get_network_votes(observation)
+                elapsed = time.monotonic() - start
+        # Nodes are requested concurrently and the late one is not awaited
+        self.assertLess(elapsed, 1.5)
+        self.assertEqual(
+            votes['Node for Tests 1 (-)'],
+            {'result': ['NEGATIVE'], 'prob': [0.9]}
+        )
+        self.assertEqual(
+            votes['Node for Tests 2 (-)'], {'result': None, 'prob': None}
+        )
+        # Missing votes are not taken into account
+        p1, s1, v1 = cc.network_predict(observation)
+        self.assertEqual(len(p1), 1)
+        # -> Test the pool is released if the local prediction fails
+        with patch.object(NetworkNode, 'predict', autospec=True,
+                          side_effect=slow_predict), \
+                patch.object(cc, 'predict', side_effect=ValueError), \
+                patch('base.models.ThreadPoolExecutor.shutdown') as shutdown:
+            with self.assertRaises(ValueError):
+                cc._get_network_votes(observation)
+        shutdown.assert_called_once_with(wait=False, cancel_futures=True)
+
     def test_network_data_sharing(self):
         self.node_1.data_sharing_is_enabled = True
         self.node_1.save()
         NetworkErrorLog.objects.all().delete()
+        DataSharingOutbox.objects.all().delete()
         self.client.force_login(user=self.user)
         drf_request_client = RequestsClient()
 
@@ -535,42 +636,56 @@ class TestBase(SimpleTestCase):
             'lymp': Decimal("0.1"),
             'mono': Decimal("0.1"),
         }
+        response = self.client.post(
+            reverse("data:input"),
+            post_data,
+            follow=True
+        )
+        self.assertEqual(response.status_code, 200)
+        # Data is queued for sharing
+        self.assertEqual(self.node_1.outbox.count(), 1)
         with patch.object(NetworkNode,
                           '_requests_client', drf_request_client):
-            response = self.client.post(
-                reverse("data:input"),
-                post_data,
-                follow=True
-            )
-        self.assertEqual(response.status_code, 200)
+            self.assertEqual(self.node_1.process_outbox(), (1, 0))
         # If no error logs were generated, the requests were sent
         # and were successful, endpoints are tested in data.tests
         self.assertEqual(list(NetworkErrorLog.objects.all()), [])
+        self.assertEqual(self.node_1.outbox.count(), 0)
 
         self.node_1.data_sharing_mode = \
             self.node_1.DATA_SHARING_MODE_ON_FINISHED
         self.node_1.save()
 
-        with patch.object(NetworkNode,
-                          '_requests_client', drf_request_client):
-            response = self.client.post(
-                reverse("data:input"),
-                post_data,
-                follow=True
-            )
+        response = self.client.post(
+            reverse("data:input"),
+            post_data,
+            follow=True
+        )
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(list(NetworkErrorLog.objects.all()), [])
+        self.assertEqual(self.node_1.outbox.count(), 0)
 
         post_data["is_finished"] = True
+        response = self.client.post(
+            reverse("data:input"),
+            post_data,
+            follow=True
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.node_1.outbox.count(), 1)
+        # Incomplete batches are held until the linger time
+        with self.settings(DATA_SHARING_OUTBOX_BATCH_LINGER=60):
+            self.assertEqual(self.node_1.process_outbox(), (0, 0))
+        # Claimed entries are not processed by other workers until their
+        # lease expires
+        self.assertEqual(len(self.node_1.claim_outbox()), 1)
+        self.assertEqual(self.node_1.claim_outbox(), [])
+        self.assertEqual(self.node_1.process_outbox(), (0, 0))
+        self.node_1.outbox.update(next_attempt=timezone.now())
         with patch.object(NetworkNode,
                           '_requests_client', drf_request_client):
-            response = self.client.post(
-                reverse("data:input"),
-                post_data,
-                follow=True
-            )
-        self.assertEqual(response.status_code, 200)
+            call_command('share_data', '--once', stdout=StringIO())
         self.assertEqual(list(NetworkErrorLog.objects.all()), [])
+        self.assertEqual(self.node_1.outbox.count(), 0)
 
         # -> Test Error Logs catching errors
         response = self.client.post(
@@ -581,22 +696,38 @@ class TestBase(SimpleTestCase):
         # Data is created
         self.assertEqual(response.status_code, 200)
         # but not propagated
+        self.assertEqual(self.node_1.process_outbox(), (0, 1))
         error_log = NetworkErrorLog.objects.last()
         self.assertIn('[Errno 111] Connection refused', error_log.message)
+        # and retried later
+        entry = self.node_1.outbox.get()
+        self.assertEqual(entry.attempts, 1)
+        self.assertEqual(entry.status, DataSharingOutbox.STATUS_PENDING)
+        self.assertGreater(entry.next_attempt, timezone.now())
+        self.assertEqual(self.node_1.process_outbox(), (0, 0))
+        # until it is considered dead
+        self.node_1.outbox.update(next_attempt=timezone.now())
+        with self.settings(DATA_SHARING_OUTBOX_MAX_ATTEMPTS=2):
+            self.assertEqual(self.node_1.process_outbox(), (0, 1))
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, DataSharingOutbox.STATUS_DEAD)
+        self.node_1.outbox.all().delete()
 
         self.node_1.remote_user_token = None
         self.node_1.save()
+        response = self.client.post(
+            reverse("data:input"),
+            post_data,
+            follow=True
+        )
+        self.assertEqual(response.status_code, 200)
         with patch.object(NetworkNode,
                           '_requests_client', drf_request_client):
-            response = self.client.post(
-                reverse("data:input"),
-                post_data,
-                follow=True
-            )
-        self.assertEqual(response.status_code, 200)
+            self.node_1.process_outbox()
         error_log = NetworkErrorLog.objects.last()
         self.assertEqual(403, error_log.status_code)
 
+        self.node_1.outbox.all().delete()
         self.node_1.data_sharing_is_enabled = False
         self.node_1.remote_user_token = self.user_node_token.key
         self.node_1.save()
@@ -656,6 +787,76 @@ class TestBase(SimpleTestCase):
         self.assertTrue(cc == cached)
         cc.delete()
 
+    def test_currentclassifier_store(self):
+        cc = CurrentClassifier(external=self.classifier_external)
+        cc.save()
+        # -> Test building and publishing it lazily
+        self.assertFalse(
+            os.path.exists(classifier_store.get_artifact_path(cc.version))
+        )
+        self.assertEqual(CurrentClassifier.get(), cc)
+        self.assertTrue(
+            os.path.exists(classifier_store.get_artifact_path(cc.version))
+        )
+        # -> Test loading from the store only once per version
+        CurrentClassifier._loaded = None
+        with patch.object(classifier_store, 'load',
+                          wraps=classifier_store.load) as load_mock:
+            self.assertEqual(CurrentClassifier.get(), cc)
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(CurrentClassifier.get(), cc)
+            self.assertEqual(len(queries), 1)
+        load_mock.assert_called_once_with(cc.version)
+        # -> Test invalidation by changes of its classifier
+        self.classifier_external.save()
+        cached = CurrentClassifier.get()
+        self.assertNotEqual(cached.version, cc.version)
+        self.assertTrue(
+            os.path.exists(classifier_store.get_artifact_path(cached.version))
+        )
+        self.assertFalse(
+            os.path.exists(classifier_store.get_artifact_path(cc.version))
+        )
+        # -> Test other classifiers do not invalidate it
+        self.classifier.save()
+        self.assertEqual(CurrentClassifier.get().version, cached.version)
+        cc.delete()
+
+    def test_classifier_store_dir(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "store")
+            with self.settings(CLASSIFIER_STORE_DIR=path):
+                self.assertEqual(classifier_store.load("missing"), None)
+                self.assertEqual(
+                    classifier_store.get_store_dir(create=True), path
+                )
+                self.assertEqual(os.stat(path).st_mode & 0o777, 0o700)
+                # -> Test directories writable by others are refused
+                os.chmod(path, 0o777)
+                with self.assertRaises(ImproperlyConfigured):
+                    classifier_store.load("missing")
+                with self.assertRaises(ImproperlyConfigured):
+                    classifier_store.get_store_dir(create=True)
+
+    def test_classifier_store_clear(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with self.settings(CLASSIFIER_STORE_DIR=tmp_dir):
+                paths = [
+                    classifier_store.get_artifact_path(version)
+                    for version in ("old", "kept", "new")
+                ]
+                for mtime, path in enumerate(paths):
+                    open(path, "w").close()
+                    os.utime(path, (mtime, mtime))
+                # Only the ones older than the one to keep are removed
+                classifier_store.clear(keep=paths[1])
+                self.assertEqual(
+                    [os.path.exists(path) for path in paths],
+                    [False, True, True]
+                )
+                classifier_store.clear()
+                self.assertFalse(any(os.path.exists(path) for path in paths))
+
     def test_currentclassifier_admin(self):
         self.client.force_login(user=self.user)
         response = self.client.get(
@@ -681,6 +882,118 @@ class TestBase(SimpleTestCase):
             })
         self.assertEqual(success, True)
 
+    def test_networknode_share_data_bulk_responses(self):
+        NetworkErrorLog.objects.all().delete()
+        records = [{'uuid': str(uuid4()), 'rbc': 3} for i in range(2)]
+        session = Mock()
+        with patch.object(NetworkNode, '_get_requests_client',
+                          return_value=session):
+            # -> Test unexpected responses are logged
+            session.put.return_value = Mock(
+                status_code=200, content=b"<html>",
+                json=Mock(side_effect=ValueError("Expecting value"))
+            )
+            self.assertIs(self.node_1.share_data_bulk(records), False)
+            session.put.return_value = Mock(
+                status_code=200, content=b'{"results": []}',
+                json=Mock(return_value={'results': []})
+            )
+            self.assertIs(self.node_1.share_data_bulk(records), False)
+            self.assertEqual(
+                self.node_1.errors_log.count(), 2
+            )
+            # -> Test nodes without the bulk endpoint are shared one by one
+            for status_code in (404, 405):
+                session.put.return_value = Mock(status_code=status_code)
+                with patch.object(NetworkNode, 'share_data',
+                                  return_value=True) as share_data:
+                    self.assertEqual(
+                        self.node_1.share_data_bulk(records),
+                        {record['uuid']: True for record in records}
+                    )
+                self.assertEqual(share_data.call_count, 2)
+
+    def test_networknode_pooled_session(self):
+        node = NetworkNode.objects.get(pk=self.node_2.pk)
+        session = node._get_requests_client()
+        self.assertIs(node._get_requests_client(), session)
+        # Sessions are shared among instances of the same service
+        self.assertIs(
+            NetworkNode.objects.get(pk=node.pk)._get_requests_client(),
+            session
+        )
+        # and renewed on changes of the Service URL or the Token
+        node.service_url = "http://127.0.0.1"
+        new_session = node._get_requests_client()
+        self.assertIsNot(new_session, session)
+        node.remote_user_token = "new-token"
+        self.assertIsNot(node._get_requests_client(), new_session)
+        # Overriding the client takes precedence
+        drf_request_client = RequestsClient()
+        with patch.object(NetworkNode,
+                          '_requests_client', drf_request_client):
+            self.assertIs(node._get_requests_client(), drf_request_client)
+
+    @override_settings(DATA_SYNC_LAG=0)
+    def test_networknode_sync_data(self):
+        NetworkErrorLog.objects.all().delete()
+        drf_request_client = RequestsClient()
+        data = Data.objects.create(
+            user=self.user, unit=self.unit, chtuid='abc01', rbc=3
+        )
+        # Data from the current node is not received
+        own_data = Data.objects.create(user=self.user, unit=self.unit, rbc=3)
+        self.node_1.data_sync_is_enabled = True
+        self.node_1.data_sync_cursor = None
+        self.node_1.clean()
+        self.node_1.save()
+        last_updated = data.last_updated
+        with patch.object(NetworkNode,
+                          '_requests_client', drf_request_client):
+            with patch.object(Data, 'bulk_upsert',
+                              wraps=Data.bulk_upsert) as bulk_upsert:
+                received = self.node_1.sync_data()
+        self.assertGreater(received, 0)
+        self.assertEqual(list(NetworkErrorLog.objects.all()), [])
+        records, user, unit = bulk_upsert.call_args[0]
+        self.assertIn(str(data.uuid), records)
+        self.assertNotIn(str(own_data.uuid), records)
+        self.assertEqual((user, unit), (self.user_node, self.unit_node))
+        # Records already in place are not updated
+        data.refresh_from_db()
+        self.assertEqual(data.last_updated, last_updated)
+        # The cursor is stored
+        self.node_1.refresh_from_db()
+        self.assertTrue(self.node_1.data_sync_cursor)
+        with patch.object(NetworkNode,
+                          '_requests_client', drf_request_client):
+            call_command('sync_data', stdout=StringIO())
+        # Test with no network access
+        self.assertEqual(self.node_1.sync_data(), False)
+        error_log = NetworkErrorLog.objects.last()
+        self.assertEqual(error_log.action, NetworkErrorLog.ACTION_SYNC_DATA)
+        # Test with nodes not supporting synchronization (paginated list)
+        session = Mock()
+        session.get.return_value = Mock(
+            status_code=200, content=b'{"next": null, "results": []}',
+            json=Mock(return_value={'next': None, 'results': []})
+        )
+        with patch.object(NetworkNode, '_get_requests_client',
+                          return_value=session):
+            self.assertEqual(self.node_1.sync_data(), False)
+        error_log = NetworkErrorLog.objects.last()
+        self.assertIn("Unexpected response", error_log.message)
+        # User and Unit are required
+        self.node_2.data_sync_is_enabled = True
+        with self.assertRaises(ValidationError):
+            self.node_2.clean()
+        self.node_2.data_sync_is_enabled = False
+        self.node_1.data_sync_is_enabled = False
+        self.node_1.data_sync_cursor = None
+        self.node_1.save()
+        data.delete()
+        own_data.delete()
+
     def test_update_metadata_view(self):
         _, _ = CurrentClassifier.objects.get_or_create(
             classifier=self.classifier
@@ -784,6 +1097,17 @@ class TestBase(SimpleTestCase):
             self.node_1.clean()
         self.node_1.metrics = "accuracy_score"
 
+    def wait_for_graph(self, url, timeout=60):
+        """
+        Polls the graph endpoint until the graph is rendered.
+        """
+        deadline = time.time() + timeout
+        while True:
+            response = self.client.get(url)
+            if response.status_code != 202 or time.time() > deadline:
+                return response
+            time.sleep(0.1)
+
     def test_covidhtmixin(self):
         self.classifier.perform_inference(save=False)
         self.assertTrue(
@@ -807,7 +1131,84 @@ class TestBase(SimpleTestCase):
             )
             self.assertEqual(response.status_code, 200)
             self.assertContains(response, 'POSITIVE')
-            self.assertContains(response, 'svg')
+            self.assertTrue(
+                response.context['graph'].startswith('/api/v1/graph/')
+            )
+            response = self.wait_for_graph(response.context['graph'])
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['Content-Type'], 'image/svg+xml')
+            self.assertIn(b'svg', response.content)
+
+    def test_graphing_cache(self):
+        self.classifier.perform_inference()
+        observation = {
+            'rbc': 3, 'wbc': 5, 'plt': 150, 'neut': 0.1, 'lymp': 0.1,
+            'mono': 0.1,
+        }
+        with self.settings(GRAPHING_MESH_STEPS=10):
+            self.classifier.generate_graph(observation)
+            self.assertIsNotNone(self.classifier.get_graphing_context())
+            # -> Test mesh evaluations are reused within the same bucket
+            observation['plt'] = 150.01
+            with patch.object(self.classifier, 'get_engine_object',
+                              wraps=self.classifier.get_engine_object) as eo:
+                with patch.object(self.classifier, 'get_data',
+                                  wraps=self.classifier.get_data) as gd:
+                    self.classifier.generate_graph(observation)
+            eo.assert_not_called()
+            gd.assert_not_called()
+
+    def test_graphing_quantize_observation(self):
+        ranges = graphing.get_columns_ranges(
+            np.array([[0, 10, 1], [10, 20, np.nan]], dtype=float)
+        )
+        self.assertEqual(ranges, [(0, 10), (10, 20), (1, 1)])
+        obs = [3.2, 12.1, 1, None]
+        self.assertEqual(
+            graphing.quantize_observation(obs, (0, 3), ranges, 10),
+            [None, 12.5, 1, None]
+        )
+        self.assertEqual(
+            graphing.quantize_observation(obs, (0, 3), ranges, 0),
+            [None, 12.1, 1, None]
+        )
+
+    def test_graphing_sample_dataset(self):
+        targets = np.array([0] * 900 + [1] * 100)
+        sample = graphing.sample_dataset(targets, 100)
+        self.assertEqual(len(sample), 100)
+        self.assertEqual((targets[sample] == 1).sum(), 10)
+        self.assertEqual(
+            list(graphing.sample_dataset(targets[:5], 100)), [0, 1, 2, 3, 4]
+        )
+        with self.settings(GRAPHING_DATASET_MAX_POINTS=10):
+            self.classifier.perform_inference()
+            context = self.classifier.get_graphing_context()
+            self.assertTrue(len(context["data"]) <= 11)
+            self.assertEqual(len(context["data"]), len(context["targets"]))
+            self.assertTrue(len(context["densities"]) > 0)
+
+    def test_graphing_impute_grid(self):
+        class DependentImputer:
+            def impute_row(self, row):
+                mean = 5.0 if row[0] is None else row[0] * 2
+                return [mean if v is None else v for v in row]
+
+        xx, yy = np.meshgrid(np.arange(3.), np.arange(3.))
+        grid = np.column_stack(
+            (xx.ravel(), yy.ravel(), np.full(9, None), np.full(9, 1.0))
+        )
+        imputer = DependentImputer()
+        with patch.object(imputer, 'impute_row',
+                          wraps=imputer.impute_row) as impute_row:
+            imputed = graphing.impute_grid(imputer, grid, (0, 1))
+        # -> Test the constant part is imputed once without the pair
+        self.assertEqual(impute_row.call_count, 1)
+        self.assertEqual(impute_row.call_args[0][0][:2], [None, None])
+        self.assertEqual(list(imputed[:, 2]), [5.0] * 9)
+        self.assertEqual(list(imputed[:, 0]), list(xx.ravel()))
+        self.assertEqual(list(imputed[:, 3]), [1.0] * 9)
+        self.assertEqual(imputed.dtype, float)
 
     def test_metrics(self):
         # Test specificity
@@ -999,6 +1400,13 @@ class TestBase(SimpleTestCase):
             )
             self.assertEqual(response.status_code, 200)
             self.assertIn(b'POSITIVE', response.content)
+            graphs = response.json()['graph']
+            self.assertEqual(len(graphs), 1)
+            self.assertIn(graphs[0]['token'], graphs[0]['url'])
+            response = self.wait_for_graph(
+                reverse("rest-api:graph", args=[graphs[0]['token']])
+            )
+            self.assertEqual(response.status_code, 200)
             self.assertIn(b'svg', response.content)
 
             response = self.client.post(
@@ -1019,7 +1427,64 @@ class TestBase(SimpleTestCase):
                 content_type="application/json"
             )
             self.assertEqual(response.status_code, 200)
-            self.assertIn(b'svg', response.content)
+            graphs = response.json()['graph']
+            self.assertEqual(len(graphs), 2)
+            for graph in graphs:
+                response = self.wait_for_graph(
+                    reverse("rest-api:graph", args=[graph['token']])
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertIn(b'svg', response.content)
+
+            # -> Test unknown tokens
+            response = self.client.get(
+                reverse("rest-api:graph", args=["unknown"])
+            )
+            self.assertEqual(response.status_code, 404)
+
+            # -> Test errors are not exposed
+            def failing_graph(graph_format="svg"):
+                raise ValueError("secret")
+
+            with self.assertLogs('base.graphing', level='ERROR'):
+                token = graphing.submit_graph(failing_graph)
+                response = self.wait_for_graph(
+                    reverse("rest-api:graph", args=[token])
+                )
+            self.assertEqual(response.status_code, 500)
+            self.assertNotIn(b'secret', response.content)
+
+            # -> Test output formats
+            observation = {
+                'rbc': 3, 'wbc': 5, 'plt': 150, 'neut': 0.1, 'lymp': 0.1,
+                'mono': 0.1,
+            }
+            response = self.client.post(
+                reverse("rest-api:classify") + '?graph=True&graph_format=png',
+                observation
+            )
+            response = self.wait_for_graph(response.json()['graph'][0]['url'])
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['Content-Type'], 'image/png')
+            self.assertEqual(response.content[:4], b'\x89PNG')
+            response = self.client.post(
+                reverse("rest-api:classify") + '?graph=True&graph_format=json',
+                observation
+            )
+            response = self.wait_for_graph(response.json()['graph'][0]['url'])
+            self.assertEqual(response.status_code, 200)
+            planes = response.json()['planes']
+            self.assertTrue(len(planes) > 0)
+            self.assertEqual(
+                set(planes[0]),
+                {'fields', 'axis', 'observation', 'decision_function',
+                 'density'}
+            )
+            response = self.client.post(
+                reverse("rest-api:classify") + '?graph=True&graph_format=gif',
+                observation
+            )
+            self.assertEqual(response.status_code, 400)
 
         with self.settings(GRAPHING=False):                
             response = self.client.post(
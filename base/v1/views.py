@@ -1,4 +1,6 @@
 from django.conf import settings
+from django.http import HttpResponse
+from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 
 from rest_framework import generics
@@ -10,6 +12,7 @@ from data.serializers import (
 )
 from data.models import Data
 
+from .. import graphing
 from ..models import CurrentClassifier
 
 
@@ -20,6 +23,7 @@ class Classify(generics.GenericAPIView):
     serializer_class = DataClassificationSerializer
     use_network = False
     graph = False
+    graph_format = "svg"
     _classifier = None
 
     def get_data(self, serializer):
@@ -41,7 +45,17 @@ class Classify(generics.GenericAPIView):
 
     def generate_graph(self, data):
         if settings.GRAPHING:
-            return self.get_classifier().generate_graph(data)
+            return [
+                {
+                    'token': token,
+                    'url': self.request.build_absolute_uri(
+                        reverse("rest-api:graph", args=[token])
+                    )
+                }
+                for token in self.get_classifier().submit_graph(
+                    data, graph_format=self.graph_format
+                )
+            ]
         return None
 
     def post(self, request, format=None):
@@ -52,17 +66,23 @@ class Classify(generics.GenericAPIView):
             self.request.GET.get('use_network', False) in ["True", "true"]
         self.graph = \
             self.request.GET.get('graph', False) in ["True", "true"]
+        self.graph_format = self.request.GET.get('graph_format', "svg")
+        if self.graph and self.graph_format not in graphing.GRAPH_FORMATS:
+            return Response(
+                {'graph_format': _("Must be one of: %(formats)s") % {
+                    'formats': ", ".join(graphing.GRAPH_FORMATS)}},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         if self.get_classifier():
             serializer = self.serializer_class(data=request.data)
             if serializer.is_valid():
-                (result, result_prob, votes) = \
-                    self.predict(self.get_data(serializer))
+                data = self.get_data(serializer)
+                (result, result_prob, votes) = self.predict(data)
                 response_content = {'result': result, 'prob': result_prob}
                 if self.use_network:
                     response_content['votes'] = votes
                 if self.graph:
-                    response_content['graph'] = \
-                        self.generate_graph(self.get_data(serializer))
+                    response_content['graph'] = self.generate_graph(data)
                 return Response(response_content, status=status.HTTP_200_OK)
             else:
                 return Response(
@@ -92,8 +112,36 @@ class ClassifyDataset(Classify):
     serializer_class = DatasetClassificationSerializer
 
     def get_data(self, serializer):
-        data = []
-        for s_vd in serializer.validated_data['dataset']:
-            d = Data.apply_conversion_fields_rules_to_dict(s_vd)
-            data.append(d)
-        return data
+        # Converted by columns (see apply_conversion_fields_rules_to_dataset),
+        # the feature matrix is built by the technique from the dicts
+        return Data.apply_conversion_fields_rules_to_dataset(
+            serializer.validated_data['dataset']
+        )
+
+
+class Graph(generics.GenericAPIView):
+    """
+    Endpoint for retrieving the graphs of classifications, which are
+    rendered in the background.
+    """
+
+    def get(self, request, token, format=None):
+        graph = graphing.get_graph(token)
+        if graph is None:
+            return Response(
+                {'detail': _("Graph not found or expired")},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        if graph["status"] == graphing.GRAPH_PENDING:
+            return Response(graph, status=status.HTTP_202_ACCEPTED)
+        if graph["status"] == graphing.GRAPH_ERROR:
+            return Response(
+                dict(graph, detail=_("Error rendering the graph")),
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        if graph["format"] == "json":
+            return Response(graph["graph"], status=status.HTTP_200_OK)
+        return HttpResponse(
+            graph["graph"],
+            content_type=graphing.GRAPH_FORMATS[graph["format"]]
+        )
@@ -3,18 +3,21 @@ from django.contrib import messages
 from django.contrib.auth.mixins import UserPassesTestMixin
 # from django.contrib.contenttypes.models import ContentType
 from django.shortcuts import get_object_or_404, render
+from django.urls import reverse
+from django.utils.functional import SimpleLazyObject
 from django.views.generic import RedirectView
 from django.utils.translation import gettext_lazy as _
-from django.utils.safestring import mark_safe
 
 from data.forms import DataClassificationForm
 from data.models import Data
 
+from . import fragment_cache
 from .models import CurrentClassifier, ExternalClassifier, NetworkNode
 
 
 def home(request):
-    classifier = CurrentClassifier.get()
+    # Lazy, so they are not queried when the fragments are in the cache
+    classifier = SimpleLazyObject(CurrentClassifier.get)
     nodes = NetworkNode.objects.filter(classification_request=True)
     example_data = getattr(settings, "EXAMPLE_DATA_V2", False)
     chtuid = getattr(settings, "CHTUID", "-")
@@ -32,7 +35,10 @@ def home(request):
                 result = result[0]
                 result_prob = result_prob[0]
                 if graphing:
-                    graph = mark_safe(classifier.generate_graph(data)[0])
+                    graph = reverse(
+                        "rest-api:graph",
+                        args=[classifier.submit_graph(data)[0]]
+                    )
             except Exception as e:
                 classifier_error = str(e)
     else:
@@ -51,7 +57,8 @@ def home(request):
             'result': result,
             'result_prob': result_prob,
             'votes': votes,
-            'graph': graph
+            'graph': graph,
+            **fragment_cache.get_context('classifier')
         }
     )
 
@@ -261,22 +261,121 @@ DATA_INPUT_FORM_FIELDS = [
 # Data Input or provide a list with the desired fields)
 DATA_CLASSIFICATION_FORM_FIELDS = "__all__"
 
+# Amount of records fetched from the database at a time while streaming
+# CSV exports
+DATA_EXPORT_CHUNK_SIZE = \
+    int(os.environ.get("COVIDHT_DATA_EXPORT_CHUNK_SIZE", 2000))
+
+# Amount of records validated and created at a time while importing data
+DATA_IMPORT_CHUNK_SIZE = \
+    int(os.environ.get("COVIDHT_DATA_IMPORT_CHUNK_SIZE", 1000))
+
+# Networking
+# Connection pooling and retries (with backoff) of idempotent requests
+# to External Classifiers and Network Nodes
+NETWORK_POOL_CONNECTIONS = \
+    int(os.environ.get("COVIDHT_NETWORK_POOL_CONNECTIONS", 1))
+NETWORK_POOL_MAXSIZE = \
+    int(os.environ.get("COVIDHT_NETWORK_POOL_MAXSIZE", 10))
+NETWORK_RETRIES = int(os.environ.get("COVIDHT_NETWORK_RETRIES", 2))
+NETWORK_RETRIES_BACKOFF_FACTOR = \
+    float(os.environ.get("COVIDHT_NETWORK_RETRIES_BACKOFF_FACTOR", 0.3))
+
+# Maximum amount of records to be received in bulk from the network
+DATA_BULK_MAX_SIZE = int(os.environ.get("COVIDHT_DATA_BULK_MAX_SIZE", 1000))
+
+# Maximum amount of records to be provided in each data synchronization
+# request from the network
+DATA_SYNC_PAGE_SIZE = int(os.environ.get("COVIDHT_DATA_SYNC_PAGE_SIZE", 500))
+# Seconds the changes of Data are held back from the data synchronization,
+# which should be longer than the transactions saving Data
+DATA_SYNC_LAG = int(os.environ.get("COVIDHT_DATA_SYNC_LAG", 60))
+
+# Data Sharing Outbox
+# Maximum amount of concurrent requests to each node when sharing data
+DATA_SHARING_OUTBOX_NODE_CONCURRENCY = \
+    int(os.environ.get("COVIDHT_DATA_SHARING_OUTBOX_NODE_CONCURRENCY", 2))
+# Records to be sent in each request when sharing data
+DATA_SHARING_OUTBOX_BATCH_SIZE = \
+    int(os.environ.get("COVIDHT_DATA_SHARING_OUTBOX_BATCH_SIZE", 100))
+# Seconds to hold an incomplete batch waiting for more records
+DATA_SHARING_OUTBOX_BATCH_LINGER = \
+    int(os.environ.get("COVIDHT_DATA_SHARING_OUTBOX_BATCH_LINGER", 0))
+# Attempts of sharing a record before it is marked as dead
+DATA_SHARING_OUTBOX_MAX_ATTEMPTS = \
+    int(os.environ.get("COVIDHT_DATA_SHARING_OUTBOX_MAX_ATTEMPTS", 10))
+# Seconds to wait before retrying the sharing of a record (doubled on
+# each attempt)
+DATA_SHARING_OUTBOX_RETRY_DELAY = \
+    int(os.environ.get("COVIDHT_DATA_SHARING_OUTBOX_RETRY_DELAY", 30))
+# Seconds the entries claimed by a worker are reserved to it, after which
+# they are processed again if the worker has not finished them
+DATA_SHARING_OUTBOX_LEASE = \
+    int(os.environ.get("COVIDHT_DATA_SHARING_OUTBOX_LEASE", 300))
+
+# Network Voting
+# Maximum amount of nodes to be requested concurrently for their votes
+NETWORK_VOTING_MAX_WORKERS = \
+    int(os.environ.get("COVIDHT_NETWORK_VOTING_MAX_WORKERS", 8))
+# Seconds to wait for the votes of the network, after which they are
+# considered as missing
+NETWORK_VOTING_TIMEOUT = \
+    float(os.environ.get("COVIDHT_NETWORK_VOTING_TIMEOUT", 10))
+
 # Graphing
 GRAPHING = os.environ.get("COVIDHT_GRAPHING", True)
 GRAPHING_FIELDS = ["rbc", "wbc", "plt", "lymp", "neut"]
 GRAPHING_DATASET = os.environ.get(
     "COVIDHT_GRAPHING_DATASET", True)
+# Maximum amount of records of the dataset (sampled by class) to be plotted
+GRAPHING_DATASET_MAX_POINTS = \
+    int(os.environ.get("COVIDHT_GRAPHING_DATASET_MAX_POINTS", 2000))
 GRAPHING_COND_DEC_FUNCTION = os.environ.get(
     "COVIDHT_GRAPHING_COND_DEC_FUNCTION", True)
 GRAPHING_MESH_STEPS = \
     int(os.environ.get("COVIDHT_GRAPHING_MESH_STEPS", 200))
-
-# Use CHTUID as a Cache key prefix and for location in Local Memory
+# Buckets in which the range of each field is divided for reusing the
+# evaluations of the mesh (0 for evaluating it at the exact observation)
+GRAPHING_MESH_BUCKETS = \
+    int(os.environ.get("COVIDHT_GRAPHING_MESH_BUCKETS", 20))
+# Seconds to keep the precomputed dataset and mesh evaluations in the cache
+GRAPHING_CACHE_TIMEOUT = \
+    int(os.environ.get("COVIDHT_GRAPHING_CACHE_TIMEOUT", 86400))
+# Seconds to keep the rendered graphs available for retrieval
+GRAPHING_RESULTS_TIMEOUT = \
+    int(os.environ.get("COVIDHT_GRAPHING_RESULTS_TIMEOUT", 600))
+# Approximate amount of steps per axis of the decision function and amount
+# of bins per axis of the dataset density in the JSON output of graphs
+GRAPHING_JSON_GRID_STEPS = \
+    int(os.environ.get("COVIDHT_GRAPHING_JSON_GRID_STEPS", 50))
+GRAPHING_JSON_BINS = int(os.environ.get("COVIDHT_GRAPHING_JSON_BINS", 30))
+
+# Classifier Store
+# Directory where the Current Classifier is stored for being shared among
+# the processes of the instance. It must be private to the instance, as
+# the classifier is unpickled from there.
+CLASSIFIER_STORE_DIR = os.environ.get(
+    "COVIDHT_CLASSIFIER_STORE_DIR",
+    os.path.join(BASE_DIR, "var", "classifier-store-{0}".format(CHTUID))
+)
+
+# Seconds to keep in the cache the fragments of the public pages of the
+# HTML front-end, which are renewed on changes of the data or the classifier
+FRAGMENTS_CACHE_TIMEOUT = \
+    int(os.environ.get("COVIDHT_FRAGMENTS_CACHE_TIMEOUT", 86400))
+
+# Use CHTUID as a Cache key prefix and for the location of the cache.
+# The cache must be shared among the processes of the instance (i.e. for
+# retrieving the graphs rendered in the background) and private to it, as
+# its entries are unpickled (the directory is created with mode 0700).
 KEY_PREFIX = CHTUID
 
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': CHTUID
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get(
+            "COVIDHT_CACHE_DIR",
+            os.path.join(BASE_DIR, "var", "cache-{0}".format(CHTUID))
+        )
     }
 }
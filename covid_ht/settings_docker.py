@@ -8,6 +8,10 @@ SECRET_KEY = os.environ.get(
 
 STATIC_ROOT = os.environ.get('STATIC_ROOT', '/vol/covid-ht/static/')
 
+CLASSIFIER_STORE_DIR = os.environ.get(
+    "COVIDHT_CLASSIFIER_STORE_DIR", '/vol/covid-ht/classifier-store/'
+)
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
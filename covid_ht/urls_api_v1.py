@@ -14,6 +14,15 @@ urlpatterns = [
     path('classify-dataset',
          base_views.ClassifyDataset().as_view(),
          name='classify-dataset'),
+    path('graph/<str:token>',
+         base_views.Graph().as_view(),
+         name='graph'),
+    path('data-bulk',
+         data_views.DataBulkUpdate().as_view(),
+         name='data-bulk'),
+    path('data-import',
+         data_views.DataImport().as_view(),
+         name='data-import'),
     path('data/<str:uuid>',
          data_views.DataReadUpdate().as_view(),
          name='data-ru'),
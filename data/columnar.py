@@ -0,0 +1,118 @@
+from itertools import islice
+from tempfile import TemporaryFile
+
+from django.conf import settings
+from django.db import models
+from django.db.models.functions import Cast
+from django.http import FileResponse
+from django.utils import timezone
+
+import pyarrow as pa
+import pyarrow.ipc  # noqa: F401
+import pyarrow.parquet as pq
+
+
+FORMATS = {
+    'parquet': ("parquet", "application/vnd.apache.parquet"),
+    'arrow': ("arrow", "application/vnd.apache.arrow.file"),
+}
+
+
+def get_arrow_type(field):
+    if isinstance(field, (models.DecimalField, models.FloatField)):
+        return pa.float64()
+    if isinstance(field, models.BooleanField):
+        return pa.bool_()
+    if isinstance(field, (models.IntegerField, models.AutoField,
+                          models.ForeignKey)):
+        return pa.int64()
+    if isinstance(field, models.DateTimeField):
+        return pa.timestamp('us', tz='UTC')
+    return pa.string()
+
+
+class ColumnarExportViewMixin:
+    """
+    Exports the queryset of a list view as a typed columnar file (Parquet
+    or Arrow IPC), built by chunks of a server-side cursor over
+    .values_list().
+    """
+    # 'parquet' or 'arrow'
+    file_format = 'parquet'
+    # Columns of the file, defaults to the fields of the serializer
+    export_columns = None
+    # Columns not mapped to a field: {column: expression}
+    export_expressions = {}
+    export_filename = "covid-ht-data-{0}UTC"
+
+    def get_export_columns(self):
+        if self.export_columns is None:
+            return list(self.get_serializer().fields)
+        return self.export_columns
+
+    def get_export_plan(self, queryset):
+        """
+        Returns the queryset of the columns' values, the schema of the file
+        and the per-value converters of the columns (if needed).
+        """
+        model = queryset.model
+        annotations, lookups, fields, converters = {}, [], [], []
+        for column in self.get_export_columns():
+            if column in self.export_expressions:
+                expression = self.export_expressions[column]
+                field = expression.output_field
+            else:
+                field = model._meta.get_field(column)
+                expression = models.F(field.attname)
+            if isinstance(field, models.DecimalField):
+                # Let the database cast them instead of converting Decimals
+                expression = Cast(expression, models.FloatField())
+            annotations["_col_{0}".format(column)] = expression
+            lookups.append("_col_{0}".format(column))
+            fields.append(pa.field(column, get_arrow_type(field)))
+            converters.append(
+                str if isinstance(field, models.UUIDField) else None
+            )
+        queryset = queryset.annotate(**annotations).values_list(*lookups)
+        return (queryset, pa.schema(fields), converters)
+
+    def write_file(self, queryset, sink):
+        queryset, schema, converters = self.get_export_plan(queryset)
+        if self.file_format == 'parquet':
+            writer = pq.ParquetWriter(sink, schema)
+        else:
+            writer = pa.ipc.new_file(sink, schema)
+        rows = queryset.iterator(chunk_size=settings.DATA_EXPORT_CHUNK_SIZE)
+        while True:
+            chunk = list(islice(rows, settings.DATA_EXPORT_CHUNK_SIZE))
+            if not chunk:
+                break
+            columns = []
+            for values, converter, field in \
+                    zip(zip(*chunk), converters, schema):
+                if converter:
+                    values = [
+                        converter(v) if v is not None else None
+                        for v in values
+                    ]
+                columns.append(pa.array(values, type=field.type))
+            writer.write_table(
+                pa.Table.from_arrays(columns, schema=schema)
+            )
+        writer.close()
+
+    def get_export_filename(self):
+        return self.export_filename.format(
+            timezone.now().utcnow().strftime("%Y%m%dT%I%M")
+        )
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        extension, content_type = FORMATS[self.file_format]
+        tmpfile = TemporaryFile()
+        self.write_file(queryset, tmpfile)
+        tmpfile.seek(0)
+        return FileResponse(
+            tmpfile, as_attachment=True, content_type=content_type,
+            filename="{0}.{1}".format(self.get_export_filename(), extension)
+        )
@@ -1,39 +1,58 @@
 #
 from decimal import Decimal
 
+import numpy as np
+
+
+# Linear conversions: {function: (multiplier, divisor)}, shared by the
+# scalar and the array functions
+LINEAR_CONVERSIONS = {
+    # Needs revision
+    'mmolL_to_gL': (Decimal("1.62"), 1),
+    # Needs revision
+    'umolL_to_mgdL': (Decimal("6.25"), 1),
+    # Needs revision
+    'umolL_to_mgL': (Decimal("6.25"), Decimal("10")),
+    # Needs revision
+    'gdL_to_gL': (1, Decimal("10")),
+    # Needs revision
+    'fmolcell_to_pgcell': (Decimal("16.114"), 1),
+    # Needs revision
+    'mgmL_to_kUIL': (Decimal("5.3"), 1),
+}
+
+
+def _linear(value, conv_function):
+    multiplier, divisor = LINEAR_CONVERSIONS[conv_function]
+    return value * multiplier / divisor
+
 
 def percentage(conversion_field_value, relative_to_value):
     return relative_to_value * conversion_field_value / 100
 
 
 def mmolL_to_gL(value, other=None):
-    # Needs revision
-    return value * Decimal("1.62")
+    return _linear(value, 'mmolL_to_gL')
 
 
 def umolL_to_mgdL(value, other=None):
-    # Needs revision
-    return value * Decimal("6.25")
+    return _linear(value, 'umolL_to_mgdL')
 
 
 def umolL_to_mgL(value, other=None):
-    # Needs revision
-    return value * Decimal("6.25") / Decimal("10")
+    return _linear(value, 'umolL_to_mgL')
 
 
 def gdL_to_gL(value, other=None):
-    # Needs revision
-    return value / Decimal("10")
+    return _linear(value, 'gdL_to_gL')
 
 
 def fmolcell_to_pgcell(value, other=None):
-    # Needs revision
-    return value * Decimal("16.114")
+    return _linear(value, 'fmolcell_to_pgcell')
 
 
 def mgmL_to_kUIL(value, other=None):
-    # Needs revision
-    return value * Decimal("5.3")
+    return _linear(value, 'mgmL_to_kUIL')
 
 
 CONVERSION_FUNCTIONS = {
@@ -47,9 +66,64 @@ CONVERSION_FUNCTIONS = {
 }
 
 
-def unit_conversion(value, from_unit, to_unit, relative_to_value=None):
+def get_conversion_function_name(from_unit, to_unit):
     if from_unit == 'percentage':
-        conv_function = 'percentage'
-    else:
-        conv_function = "{0}_to_{1}".format(from_unit, to_unit)
-    return CONVERSION_FUNCTIONS[conv_function](value, relative_to_value)
+        return 'percentage'
+    return "{0}_to_{1}".format(from_unit, to_unit)
+
+
+def get_conversion_function(from_unit, to_unit):
+    return CONVERSION_FUNCTIONS[
+        get_conversion_function_name(from_unit, to_unit)
+    ]
+
+
+def unit_conversion(value, from_unit, to_unit, relative_to_value=None):
+    return get_conversion_function(from_unit, to_unit)(
+        value, relative_to_value
+    )
+
+
+# Columnar conversions
+
+def to_array(values):
+    """
+    Returns the values (a sequence or array of numbers which may contain
+    None) as a float array, with NaN for the missing ones.
+    """
+    if isinstance(values, np.ndarray) and values.dtype.kind == 'f':
+        return values
+    return np.array(
+        [np.nan if v is None else v for v in values], dtype=float
+    )
+
+
+def percentage_array(values, relative_to_values):
+    return to_array(relative_to_values) * to_array(values) / 100
+
+
+def get_array_conversion_function(from_unit, to_unit):
+    """
+    Returns the function which converts an array of values of from_unit to
+    to_unit (given the array of the relative-to values if needed), with
+    NaN where a value is missing.
+    """
+    conv_function = get_conversion_function_name(from_unit, to_unit)
+    if conv_function == 'percentage':
+        return percentage_array
+    if conv_function not in LINEAR_CONVERSIONS:
+        raise KeyError(conv_function)
+    multiplier, divisor = LINEAR_CONVERSIONS[conv_function]
+    factor = float(multiplier) / float(divisor)
+
+    def convert_array(values, relative_to_values=None):
+        return to_array(values) * factor
+
+    return convert_array
+
+
+def unit_conversion_array(values, from_unit, to_unit,
+                          relative_to_values=None):
+    return get_array_conversion_function(from_unit, to_unit)(
+        values, relative_to_values
+    )
@@ -2,32 +2,77 @@
 from django import forms
 from django.core.exceptions import ValidationError
 from django.conf import settings
-from django.utils.translation import gettext_lazy as _
+from django.template.loader import render_to_string
+from django.utils.translation import get_language, gettext_lazy as _
 
 from .models import Data
 
 
 class GroupedFieldsFormMixin:
+    """
+    Groups the fields of the model form with their conversion fields for
+    rendering them in rows (see form_common.html).
+    """
+    fields_template_name = "data/form_common.html"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Pristine forms are rendered the same for the class
+        self.is_pristine = not (
+            self.is_bound or self.prefix or kwargs.get('initial')
+            or kwargs.get('instance')
+            or any(callable(field.initial) for field in self.fields.values())
+        )
+
+    @classmethod
+    def get_fields_groups(cls):
+        """
+        Returns the fields of the form class grouped with their conversion
+        fields, computed once per class.
+        """
+        # Looked up in the class itself so subclasses compute their own
+        groups = cls.__dict__.get('_fields_groups', None)
+        if groups is None:
+            # Only the conversion fields present in the form
+            model_fields = [
+                field.attname
+                for field in cls._meta.model._meta.concrete_fields
+                if field.attname in cls.base_fields
+            ]
+            groups, processed_fields = [], set()
+            for field in cls.base_fields:
+                if field not in processed_fields:
+                    group = [field] + [
+                        f for f in model_fields if f.startswith(field + "_U")
+                    ]
+                    groups.append(group)
+                    processed_fields.update(group)
+            cls._fields_groups = groups
+        return groups
 
     def get_grouped_fields(self):
-        grouped_fields = []
-        processed_fields = []
-        for field in self.fields:
-            if field not in processed_fields:
-                conversion_fields = [
-                    f.attname for f in self._meta.model._meta.get_fields()
-                    if f.attname.startswith(field + "_U")
-                ]
-                if not conversion_fields:
-                    grouped_fields.append([field])
-                    processed_fields.append(field)
-                else:
-                    group = [field, ]
-                    for c_field in conversion_fields:
-                        group.append(c_field)
-                    grouped_fields.append(group)
-                    processed_fields.extend(group)
-        return grouped_fields
+        return self.get_fields_groups()
+
+    def render_grouped_fields(self):
+        """
+        Returns the HTML of the fields in their groups. The one of pristine
+        (unbound) forms is rendered once per class and language.
+        """
+        if not self.is_pristine:
+            return render_to_string(
+                self.fields_template_name, {'dataform': self}
+            )
+        cls = self.__class__
+        if '_fields_html' not in cls.__dict__:
+            cls._fields_html = {}
+        language = get_language()
+        html = cls._fields_html.get(language, None)
+        if html is None:
+            html = render_to_string(
+                self.fields_template_name, {'dataform': self}
+            )
+            cls._fields_html[language] = html
+        return html
 
 
 def get_classification_fields():
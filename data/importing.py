@@ -0,0 +1,160 @@
+import csv
+from decimal import Decimal
+import io
+from itertools import islice
+import json
+import math
+
+from django.conf import settings
+from django.db import models, transaction
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+from .models import Data
+from .serializers import DataBulkInputSerializer
+from .signals import data_bulk_saved
+
+
+FORMATS = ('csv', 'jsonl', )
+
+
+def get_file_format(filename):
+    """
+    Returns the import format of a file by its extension, or None if it is
+    not supported.
+    """
+    extension = filename.rsplit('.', 1)[-1].lower() if filename else ''
+    if extension == 'ndjson':
+        return 'jsonl'
+    return extension if extension in FORMATS else None
+
+
+def read_records(stream, file_format):
+    """
+    Yields the records of a (text) stream in CSV - with a header - or JSONL
+    format as dicts, without the missing values (empty in CSV).
+    """
+    if file_format == 'csv':
+        for row in csv.DictReader(stream):
+            yield {
+                field: value for field, value in row.items()
+                if field and value not in ('', None)
+            }
+    else:
+        for line in stream:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            yield record
+
+
+def _to_field_value(field, value):
+    if math.isnan(value):
+        return None
+    if isinstance(field, models.DecimalField):
+        return Decimal(str(round(value, field.decimal_places)))
+    if isinstance(field, models.IntegerField):
+        # Rounding away the float noise before truncating, as with Decimals
+        return int(round(value, 6))
+    return value
+
+
+def apply_conversions(rows):
+    """
+    Applies the conversion rules of Data to the validated rows by columns.
+    """
+    present = set().union(*rows)
+    plan = [rule for rule in Data.get_conversion_plan()
+            if rule.source in present]
+    if not plan:
+        return rows
+    columns = {}
+    for rule in plan:
+        for field in (rule.source, rule.target, rule.relative_to):
+            if field and field in present and field not in columns:
+                columns[field] = [row.get(field, None) for row in rows]
+    converted = Data.apply_conversion_fields_rules_to_columns(columns)
+    for rule in plan:
+        field = Data._meta.get_field(rule.target)
+        for row, value in zip(rows, converted[rule.target]):
+            if row.get(rule.source, None):
+                row[rule.target] = _to_field_value(field, value)
+    return rows
+
+
+def import_records(records, user, unit, chunk_size=None):
+    """
+    Imports the records (an iterable of dicts) as Data of the user and unit
+    by chunks: each chunk is validated, converted by columns and created in
+    bulk in a transaction, queueing the created Data for sharing at once.
+    Returns the amount of records created and the errors of the invalid
+    ones - which are not imported - by their number (starting at 1).
+    """
+    chunk_size = chunk_size or settings.DATA_IMPORT_CHUNK_SIZE
+    serializer = DataBulkInputSerializer()
+    records = enumerate(records, start=1)
+    created, errors = 0, []
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            break
+        rows = []
+        for number, record in chunk:
+            if not isinstance(record, dict):
+                errors.append({
+                    'record': number,
+                    'errors': {'non_field_errors': [_("Invalid record.")]}
+                })
+                continue
+            try:
+                rows.append((number, serializer.run_validation(record)))
+            except ValidationError as exc:
+                errors.append({
+                    'record': number,
+                    'errors': serializers.as_serializer_error(exc)
+                })
+        existing = set(Data.objects.filter(
+            uuid__in=[row['uuid'] for number, row in rows]
+        ).values_list('uuid', flat=True))
+        instances = []
+        for number, row in rows:
+            if row['uuid'] in existing:
+                errors.append({
+                    'record': number,
+                    'errors': {'uuid': [_("A record with this uuid already "
+                                          "exists.")]}
+                })
+            else:
+                instances.append(row)
+                existing.add(row['uuid'])
+        instances = [
+            Data(user=user, unit=unit, **row)
+            for row in apply_conversions(instances)
+        ]
+        if not instances:
+            continue
+        with transaction.atomic():
+            # Bulk operations bypass save() and post_save
+            Data.objects.bulk_create(instances)
+            data_bulk_saved.send(sender=Data, instances=instances)
+        created += len(instances)
+    return {'created': created, 'errors': errors}
+
+
+def import_file(file, file_format, user, unit, chunk_size=None):
+    """
+    Imports a (binary) file in CSV or JSONL format, see import_records.
+    """
+    stream = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+    try:
+        return import_records(
+            read_records(stream, file_format), user, unit, chunk_size
+        )
+    finally:
+        stream.detach()
@@ -0,0 +1,153 @@
+from datetime import timedelta
+import random
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils.timezone import now
+
+from base.models import DataSharingOutbox, User
+from data.models import Data, DataStatistics
+from units.models import Unit
+
+
+BENCHMARK_UNITS = ["Benchmark Unit {0} (B)".format(i) for i in range(1, 6)]
+BENCHMARK_USER = "benchmark"
+
+
+def get_hot_queries(unit, uuid_value):
+    """
+    Returns the querysets of the hot filters of Data by name.
+    """
+    return {
+        'public_list': (
+            Data.objects.filter(is_finished=True).order_by("-timestamp")[:25]
+        ),
+        'finished_export': Data.objects.filter(is_finished=True)[:2000],
+        'unit_data': Data.objects.filter(unit=unit)[:25],
+        'lookup_by_uuid': Data.objects.filter(uuid=uuid_value),
+        'last': Data.objects.reverse()[:1],
+        'sync': Data.objects.order_by('last_updated', 'uuid')[:500],
+    }
+
+
+class Command(BaseCommand):
+    help = ('Shows the query plans and timings of the hot filters of the '
+            'Data model, optionally populating it with synthetic records')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--populate',
+            type=int,
+            default=0,
+            help='Creates the amount of synthetic records (in the '
+            'benchmark units) before running the queries',
+        )
+
+        parser.add_argument(
+            '--remove',
+            action='store_true',
+            help='Removes the synthetic records, units and user',
+        )
+
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Times each query is run, the best timing is reported',
+        )
+
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10000,
+            help='Amount of synthetic records created at a time',
+        )
+
+    def handle(self, *args, **options):
+        if options['remove']:
+            self.remove()
+            User.objects.filter(username=BENCHMARK_USER).delete()
+            Unit.objects.filter(name__in=BENCHMARK_UNITS).delete()
+            self.stdout.write(
+                self.style.SUCCESS('Successfully removed benchmark data')
+            )
+            return
+        units = [
+            Unit.objects.get_or_create(name=name)[0]
+            for name in BENCHMARK_UNITS
+        ]
+        unit = units[0]
+        user, _ = User.objects.get_or_create(
+            username=BENCHMARK_USER,
+            defaults={'last_name': '(B)', 'unit': unit}
+        )
+        if options['populate']:
+            self.populate(
+                options['populate'], user, units, options['batch_size']
+            )
+        record = Data.objects.filter(unit=unit).only('uuid').first()
+        if record is None:
+            raise CommandError(
+                'There is no benchmark data, use --populate to create it'
+            )
+        self.stdout.write(
+            "{0} records ({1})\n".format(
+                Data.objects.count(), connection.vendor
+            )
+        )
+        queries = get_hot_queries(unit, record.uuid)
+        for name, queryset in queries.items():
+            timings = []
+            for i in range(max(1, options['repeat'])):
+                start = time.perf_counter()
+                list(queryset.all())
+                timings.append(time.perf_counter() - start)
+            self.stdout.write(
+                "-> {0}: {1:.2f} ms\n{2}\n".format(
+                    name, min(timings) * 1000, queryset.explain()
+                )
+            )
+
+    def remove(self):
+        queryset = Data.objects.filter(user__username=BENCHMARK_USER)
+        unit_ids = list(
+            queryset.order_by().values_list('unit_id', flat=True).distinct()
+        )
+        DataSharingOutbox.objects.filter(data__in=queryset).delete()
+        # Deleting them in SQL, bypassing the signals which track the
+        # statistics and renew the fragments for each record
+        queryset._raw_delete(queryset.db)
+        DataStatistics.refresh(unit_ids)
+
+    def populate(self, size, user, units, batch_size):
+        start = now()
+        created = 0
+        while created < size:
+            batch = []
+            for i in range(min(batch_size, size - created)):
+                batch.append(Data(
+                    uuid=uuid.uuid4(),
+                    user=user,
+                    unit=random.choice(units),
+                    is_finished=random.random() < 0.8,
+                    is_covid19=random.random() < 0.5,
+                    timestamp=start - timedelta(
+                        minutes=random.randint(0, 60 * 24 * 365)
+                    ),
+                    rbc=round(random.uniform(2, 8), 2),
+                    wbc=round(random.uniform(2, 40), 2),
+                    plt=random.randint(100, 400),
+                ))
+            Data.objects.bulk_create(batch)
+            created += len(batch)
+        # Bulk creation bypasses the tracking of the statistics
+        DataStatistics.refresh([unit.pk for unit in units])
+        self.stdout.write(
+            self.style.SUCCESS(
+                'Successfully created benchmark data (%s observations)' % (
+                    created,
+                )
+            )
+        )
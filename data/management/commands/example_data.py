@@ -12,7 +12,7 @@ from rest_framework.authtoken.models import Token
 from django_ai.supervised_learning.models import SupervisedLearningTechnique
 
 from base.models import CurrentClassifier, DecisionTree, SVM, User
-from data.models import Data
+from data.models import Data, DataStatistics
 from data.utils import get_simulated_data
 from units.models import Unit
 
@@ -215,6 +215,8 @@ class Command(BaseCommand):
                     if random.random() > 0.1 else None
                 ds.append(d)
             data = Data.objects.bulk_create(ds)
+            # Bulk creation bypasses the tracking of the statistics
+            DataStatistics.refresh([u.unit_id for u in users])
 
             self.stdout.write(
                 self.style.SUCCESS(
@@ -0,0 +1,82 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from base.models import User
+from data.importing import FORMATS, get_file_format, import_file
+from units.models import Unit
+
+
+class Command(BaseCommand):
+    help = 'Imports data in bulk from a CSV (with a header) or JSONL file'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'file',
+            help='Path of the file to be imported',
+        )
+
+        parser.add_argument(
+            '--user',
+            required=True,
+            help='Username of the User to whom the data will be assigned',
+        )
+
+        parser.add_argument(
+            '--unit',
+            help='Name of the Unit to which the data will be assigned '
+            '(defaults to the one of the User)',
+        )
+
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            help='Format of the file (defaults to the one of its extension)',
+        )
+
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            help='Amount of records validated and created at a time '
+            '(defaults to DATA_IMPORT_CHUNK_SIZE)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError('User "%s" does not exist' % options['user'])
+        if options['unit']:
+            try:
+                unit = Unit.objects.get(name=options['unit'])
+            except Unit.DoesNotExist:
+                raise CommandError(
+                    'Unit "%s" does not exist' % options['unit']
+                )
+        else:
+            unit = user.unit
+        if unit is None:
+            raise CommandError('A unit must be selected for the User')
+        file_format = options['format'] or get_file_format(options['file'])
+        if file_format is None:
+            raise CommandError(
+                'The format of the file must be one of: %s' %
+                ", ".join(FORMATS)
+            )
+        with open(options['file'], 'rb') as file:
+            result = import_file(
+                file, file_format, user, unit, options['chunk_size']
+            )
+        for error in result['errors']:
+            self.stderr.write(
+                'Record %s: %s' % (
+                    error['record'], json.dumps(error['errors'], default=str)
+                )
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                'Successfully imported data (%s observations, %s errors)' % (
+                    result['created'], len(result['errors'])
+                )
+            )
+        )
@@ -0,0 +1,24 @@
+# Generated by Django 4.0.1 on 2026-10-18 12:00
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data', '0018_alter_data_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='data',
+            name='last_updated',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, help_text='Last time the record was changed in this instance, used for synchronizing with the network', verbose_name='Last Updated Timestamp'),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='data',
+            index=models.Index(fields=['last_updated', 'uuid'], name='data_data_last_up_3eb09a_idx'),
+        ),
+    ]
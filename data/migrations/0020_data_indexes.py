@@ -0,0 +1,59 @@
+# Generated by Django 4.0.1 on 2026-10-18 12:00
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.utils.timezone import now
+import uuid
+
+
+def rekey_duplicated_uuids(apps, schema_editor):
+    """
+    Gives new uuids to the records sharing one with an older record (which
+    was possible through the REST API), so the uuid can be made unique. The
+    oldest record of each uuid keeps it.
+    """
+    Data = apps.get_model('data', 'Data')
+    duplicated = Data.objects.order_by().values('uuid')\
+        .annotate(count=Count('pk')).filter(count__gt=1)\
+        .values_list('uuid', flat=True)
+    for duplicated_uuid in list(duplicated):
+        pks = Data.objects.filter(uuid=duplicated_uuid).order_by('pk')\
+            .values_list('pk', flat=True)
+        for pk in list(pks)[1:]:
+            Data.objects.filter(pk=pk).update(
+                uuid=uuid.uuid4(), last_updated=now()
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data', '0019_data_last_updated'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            rekey_duplicated_uuids, migrations.RunPython.noop
+        ),
+        migrations.AlterField(
+            model_name='data',
+            name='uuid',
+            field=models.UUIDField(default=uuid.uuid4, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name='data',
+            index=models.Index(fields=['timestamp'], name='data_timestamp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='data',
+            index=models.Index(fields=['is_finished', 'timestamp'], name='data_finished_timestamp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='data',
+            index=models.Index(fields=['unit', 'timestamp'], name='data_unit_timestamp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='data',
+            index=models.Index(condition=models.Q(('is_finished', True)), fields=['timestamp'], name='data_finished_only_idx'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.0.1 on 2026-10-18 12:00
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Q
+import django.db.models.deletion
+
+
+def populate_data_statistics(apps, schema_editor):
+    Data = apps.get_model('data', 'Data')
+    DataStatistics = apps.get_model('data', 'DataStatistics')
+    aggregates = Data.objects.order_by().values('unit_id').annotate(
+        data_count=Count('pk'),
+        finished_count=Count('pk', filter=Q(is_finished=True)),
+        last_timestamp=Max('timestamp'),
+    )
+    DataStatistics.objects.bulk_create(
+        [DataStatistics(**row) for row in aggregates]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('units', '0002_alter_unit_id'),
+        ('data', '0020_data_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataStatistics',
+            fields=[
+                ('unit', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='data_statistics', serialize=False, to='units.unit', verbose_name='Unit')),
+                ('data_count', models.IntegerField(default=0, verbose_name='Data Count')),
+                ('finished_count', models.IntegerField(default=0, verbose_name='Finished Data Count')),
+                ('last_timestamp', models.DateTimeField(blank=True, null=True, verbose_name='Last Data Timestamp')),
+            ],
+            options={
+                'verbose_name': 'Data Statistics',
+                'verbose_name_plural': 'Data Statistics',
+            },
+        ),
+        migrations.RunPython(
+            populate_data_statistics, migrations.RunPython.noop
+        ),
+    ]
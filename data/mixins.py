@@ -1,19 +1,59 @@
+from collections import namedtuple
 from copy import copy
+import csv
 
+import numpy as np
+
+from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.http import StreamingHttpResponse
 from django.utils.translation import gettext_lazy as _
 
-from .conversions import unit_conversion
+from .conversions import (
+    get_array_conversion_function, get_conversion_function, to_array,
+)
+
+
+ConversionRule = namedtuple(
+    'ConversionRule',
+    ['source', 'target', 'function', 'relative_to', 'array_function']
+)
 
 
 class ConversionFieldsModelMixin:
 
+    @classmethod
+    def get_conversion_plan(cls):
+        """
+        Returns the conversion rules of the model - compiled from the names
+        of its conversion fields once per class - as a tuple of
+        ConversionRule(source, target, function, relative_to).
+        """
+        # Looked up in the class itself so subclasses compile their own
+        plan = cls.__dict__.get('_conversion_plan', None)
+        if plan is None:
+            plan = tuple(
+                cls.compile_conversion_rule(field.attname)
+                for field in cls._meta.concrete_fields
+                if "_U" in field.attname
+            )
+            cls._conversion_plan = plan
+        return plan
+
+    @classmethod
+    def compile_conversion_rule(cls, field_name):
+        main_field, from_unit, relative_to_field = \
+            cls.parse_field_name(field_name)
+        to_unit = cls.MAIN_FIELDS[main_field]['unit']
+        return ConversionRule(
+            field_name, main_field,
+            get_conversion_function(from_unit, to_unit), relative_to_field,
+            get_array_conversion_function(from_unit, to_unit)
+        )
+
     @classmethod
     def get_conversion_fields(cls):
-        return [
-            field.attname for field in cls._meta.get_fields()
-            if "_U" in field.attname
-        ]
+        return [rule.source for rule in cls.get_conversion_plan()]
 
     @classmethod
     def parse_field_name(cls, field_name):
@@ -25,72 +65,198 @@ class ConversionFieldsModelMixin:
         return (main_field, unit, relative_to_field)
 
     @classmethod
-    def get_conversion_value(cls, conversion_field, obj):
+    def apply_conversion_rule(cls, rule, obj):
+        """
+        Returns the value of the target field of the rule converted from
+        the object (dict or instance), or None if there is nothing to
+        convert.
+        """
         if not isinstance(obj, dict):
-            conversion_field_value = getattr(obj, conversion_field, None)
+            value = getattr(obj, rule.source, None)
         else:
-            conversion_field_value = obj.get(conversion_field, None)
-        if not conversion_field_value:
+            value = obj.get(rule.source, None)
+        if not value:
             return None
-        main_field, from_unit, relative_to_field = \
-            cls.parse_field_name(conversion_field)
-        to_unit = cls.MAIN_FIELDS[main_field]['unit']
-        if relative_to_field:
+        if rule.relative_to:
             if not isinstance(obj, dict):
-                relative_to_value = getattr(obj, relative_to_field, None)
+                relative_to_value = getattr(obj, rule.relative_to, None)
             else:
-                relative_to_value = obj.get(relative_to_field, None)
+                relative_to_value = obj.get(rule.relative_to, None)
         else:
             relative_to_value = None
-        #
-        return unit_conversion(
-            conversion_field_value, from_unit, to_unit, relative_to_value
-        )
+        return rule.function(value, relative_to_value)
+
+    @classmethod
+    def get_conversion_value(cls, conversion_field, obj):
+        for rule in cls.get_conversion_plan():
+            if rule.source == conversion_field:
+                return cls.apply_conversion_rule(rule, obj)
+        return None
 
     @classmethod
     def apply_conversion_fields_rules_to_dict(cls, dict_obj):
         _dict = copy(dict_obj)
-        # TBI:
-        # 'dictionary changed size during iteration' runtime error is
-        # triggered if dict_obj is not copied and data is submitted with
-        # 'app/json' (and in tests) while it doesn't when submitted
-        # with 'multipart/form-data' - how it gets circumvented?
-        for field in dict_obj:
-            if 'U' in field:
-                conversion_value = cls.get_conversion_value(field, dict_obj)
-                if conversion_value:
-                    main_field, from_unit, relative_to_field = \
-                        cls.parse_field_name(field)
-                    _dict[main_field] = conversion_value
+        for rule in cls.get_conversion_plan():
+            conversion_value = cls.apply_conversion_rule(rule, dict_obj)
+            if conversion_value:
+                _dict[rule.target] = conversion_value
         return _dict
 
+    @classmethod
+    def apply_conversion_fields_rules_to_dataset(cls, dataset):
+        """
+        Applies the conversion rules to a list of dicts by columns: the
+        columns of the fields involved in the rules present in the dataset
+        are built once and converted as arrays (see
+        apply_conversion_fields_rules_to_columns). Converted values are
+        floats.
+
+        Only the conversion is vectorized: the dataset is still returned as
+        (copied) dicts, as the engine input is built from them - and
+        imputed - by the predict() of django-ai.
+        """
+        converted_dataset = [copy(dict_obj) for dict_obj in dataset]
+        fields_present = set().union(*dataset)
+        plan = [
+            rule for rule in cls.get_conversion_plan()
+            if rule.source in fields_present
+        ]
+        columns = {}
+        for rule in plan:
+            for field in (rule.source, rule.target, rule.relative_to):
+                if field in fields_present and field not in columns:
+                    columns[field] = [
+                        dict_obj.get(field, None) for dict_obj in dataset
+                    ]
+        if not columns:
+            return converted_dataset
+        converted_columns = \
+            cls.apply_conversion_fields_rules_to_columns(columns)
+        for rule in plan:
+            # Where the conversion field is present (the converted target
+            # keeps its value where the conversion is not possible)
+            sources = to_array(columns[rule.source])
+            targets = converted_columns[rule.target]
+            for index in np.flatnonzero(
+                    ~np.isnan(sources) & (sources != 0) & ~np.isnan(targets)):
+                converted_dataset[index][rule.target] = float(targets[index])
+        return converted_dataset
+
+    @classmethod
+    def apply_conversion_fields_rules_to_columns(cls, columns):
+        """
+        Applies the conversion rules to a dataset given by columns
+        ({field: array or sequence}, with NaN or None for missing values) as
+        arrays, returning the columns with the targets of the rules as float
+        arrays. As with the other paths, the converted values replace the
+        ones of the target fields where the conversion fields are present.
+        """
+        converted = dict(columns)
+        for rule in cls.get_conversion_plan():
+            if rule.source not in columns:
+                continue
+            values = to_array(columns[rule.source])
+            relative_to_values = to_array(columns[rule.relative_to]) \
+                if rule.relative_to in columns \
+                else np.full(len(values), np.nan)
+            with np.errstate(invalid='ignore'):
+                conversion_values = rule.array_function(
+                    values, relative_to_values
+                )
+            if rule.target in converted:
+                target_values = to_array(converted[rule.target])
+            else:
+                target_values = np.full(len(values), np.nan)
+            converted[rule.target] = np.where(
+                np.isnan(conversion_values) | (conversion_values == 0),
+                target_values, conversion_values
+            )
+        return converted
+
     def apply_conversion_fields_rules(self):
         applied = []
-        fields = [f.attname for f in self._meta.get_fields()]
-        for field in fields:
-            if 'U' in field:
-                conversion_value = self.get_conversion_value(field, self)
-                if conversion_value:
-                    main_field, from_unit, relative_to_field = \
-                        self.parse_field_name(field)
-                    setattr(self, main_field, conversion_value)
-                    applied.append(field)
+        for rule in self.get_conversion_plan():
+            conversion_value = self.apply_conversion_rule(rule, self)
+            if conversion_value:
+                setattr(self, rule.target, conversion_value)
+                applied.append(rule.source)
         return applied
 
+    @classmethod
+    def clean_values(cls, values):
+        """
+        Validates the values of a record given as a dict by attname, without
+        building an instance.
+        """
+        for rule in cls.get_conversion_plan():
+            if values.get(rule.source, None) and rule.relative_to \
+                    and not values.get(rule.relative_to, None):
+                raise ValidationError(
+                    {rule.relative_to:
+                        _('This field must be present in order to use '
+                          '%(field)s') % {'field': rule.source}}
+                )
+
     def clean(self):
-        for conversion_field in self.get_conversion_fields():
-            if getattr(self, conversion_field, None):
-                main_field, from_unit, relative_to_field = \
-                    self.parse_field_name(conversion_field)
-                if relative_to_field and \
-                        not getattr(self, relative_to_field, None):
-                    raise ValidationError(
-                        {relative_to_field:
-                            _('This field must be present in order to use '
-                              '%(field)s' % {'field': conversion_field})}
-                    )
+        self.clean_values(vars(self))
 
     def save(self, *args, **kwargs):
         self.clean()
         self.apply_conversion_fields_rules()
         super().save(*args, **kwargs)
+
+
+class _Echo:
+    """
+    File-like object which returns what is written, for streaming the
+    lines of a csv writer.
+    """
+    def write(self, value):
+        return value
+
+
+class StreamingCSVViewMixin:
+    """
+    Streams the queryset of a list view as CSV, writing the rows of a
+    server-side cursor over .values_list() straight to a csv writer instead
+    of instancing, serializing and rendering the whole queryset.
+    """
+    # Columns of the CSV, defaults to the header of the first renderer
+    csv_header = None
+    # Columns not mapped to a field: {column: ((lookups, ), function)}
+    csv_columns = {}
+
+    def get_csv_header(self):
+        if self.csv_header is None:
+            return self.renderer_classes[0].header
+        return self.csv_header
+
+    def get_csv_rows(self, queryset):
+        lookups, columns, index = [], [], 0
+        for column in self.get_csv_header():
+            column_lookups, function = \
+                self.csv_columns.get(column, ((column, ), None))
+            lookups.extend(column_lookups)
+            columns.append(
+                (slice(index, index + len(column_lookups)), function)
+            )
+            index += len(column_lookups)
+        rows = queryset.values_list(*lookups)\
+            .iterator(chunk_size=settings.DATA_EXPORT_CHUNK_SIZE)
+        for row in rows:
+            yield [
+                function(*row[cols]) if function else row[cols][0]
+                for cols, function in columns
+            ]
+
+    def stream_csv(self, queryset):
+        writer = csv.writer(_Echo())
+        yield writer.writerow(self.get_csv_header())
+        for row in self.get_csv_rows(queryset):
+            yield writer.writerow(row)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return StreamingHttpResponse(
+            self.stream_csv(queryset), content_type="text/csv; charset=utf-8"
+        )
@@ -3,12 +3,18 @@ import uuid
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.core.validators import (MaxValueValidator, MinValueValidator, )
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, F, Max, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.signals import post_delete, post_save
 from django.utils.timezone import now
 from django.utils.translation import gettext_lazy as _
 from django.urls import reverse
 
+from base import fragment_cache
+
 from .mixins import ConversionFieldsModelMixin
+from .signals import data_bulk_saved
 
 
 class Data(ConversionFieldsModelMixin, models.Model):
@@ -69,6 +75,8 @@ class Data(ConversionFieldsModelMixin, models.Model):
     ]
     LEARNING_LABELS = 'is_covid19'
     LEARNING_FIELDS_MONOTONIC_CONSTRAINTS = "None"
+    # Fields tracked by DataStatistics
+    STATISTICS_FIELDS = ('unit_id', 'is_finished', 'timestamp', )
     # conversion_function = unit_conversion
 
     SEX_CHOICES = (
@@ -111,12 +119,19 @@ class Data(ConversionFieldsModelMixin, models.Model):
     )
     uuid = models.UUIDField(
         default=uuid.uuid4,
-        editable=True
+        editable=True,
+        unique=True
     )
     timestamp = models.DateTimeField(
         _("Timestamp"),
         default=now
     )
+    last_updated = models.DateTimeField(
+        _("Last Updated Timestamp"),
+        auto_now=True,
+        help_text=_('Last time the record was changed in this instance, used '
+                    'for synchronizing with the network'),
+    )
     # -> CLASSIFICATION FIELDS
     # LABELS
     is_covid19 = models.BooleanField(
@@ -538,6 +553,23 @@ class Data(ConversionFieldsModelMixin, models.Model):
         verbose_name = _("Data")
         verbose_name_plural = _("Data")
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['last_updated', 'uuid']),
+            # Default ordering, i.e. Data.objects.last()
+            models.Index(fields=['timestamp'], name='data_timestamp_idx'),
+            models.Index(
+                fields=['is_finished', 'timestamp'],
+                name='data_finished_timestamp_idx'
+            ),
+            models.Index(
+                fields=['unit', 'timestamp'], name='data_unit_timestamp_idx'
+            ),
+            # Finished records (public lists and exports, learning data)
+            models.Index(
+                fields=['timestamp'], condition=models.Q(is_finished=True),
+                name='data_finished_only_idx'
+            ),
+        ]
 
     def __str__(self):
         return "{0}: {1}".format(self.uuid, self.is_covid19)
@@ -545,16 +577,75 @@ class Data(ConversionFieldsModelMixin, models.Model):
     def url(self):
         return(reverse('data:detail', args=[self.uuid]))
 
-    def clean(self):
-        super().clean()
-        if self.is_finished and \
-                getattr(self, self.LEARNING_LABELS, None) is None:
+    @classmethod
+    def clean_values(cls, values):
+        super().clean_values(values)
+        if values.get('is_finished', None) and \
+                values.get(cls.LEARNING_LABELS, None) is None:
             raise ValidationError(
-                {self.LEARNING_LABELS:
+                {cls.LEARNING_LABELS:
                     _('A record can not be marked as finished when the label'
                       ' is not present.')}
             )
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if all(f in instance.__dict__ for f in cls.STATISTICS_FIELDS):
+            # Kept for updating the statistics incrementally on changes
+            instance._statistics_values = instance.get_statistics_values()
+        return instance
+
+    def get_statistics_values(self):
+        return (self.unit_id, bool(self.is_finished), self.timestamp)
+
+    def save(self, *args, **kwargs):
+        # Data sharing is queued by the post_save receivers, which should
+        # happen in the same transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    @classmethod
+    def bulk_upsert(cls, records, user, unit):
+        """
+        Creates or updates the records (dict of validated data by uuid) with
+        a query per operation and assigns them to the user and unit,
+        returns the records created and updated - records which would not
+        change are left untouched.
+        """
+        existing = {
+            str(data.uuid): data
+            for data in cls.objects.filter(uuid__in=list(records))
+        }
+        created, updated = [], []
+        for uuid, validated_data in records.items():
+            data = existing.get(uuid, None)
+            if data is None:
+                data = cls(**validated_data)
+                created.append(data)
+            else:
+                if all(getattr(data, field) == value
+                       for field, value in validated_data.items()):
+                    # Avoids propagating again records already in place
+                    continue
+                for field, value in validated_data.items():
+                    setattr(data, field, value)
+                data.last_updated = now()
+                updated.append(data)
+            data.user = user
+            data.unit = unit
+            # Bulk operations bypass save()
+            data.apply_conversion_fields_rules()
+        update_fields = [
+            field.name for field in cls._meta.concrete_fields
+            if not field.primary_key
+        ]
+        with transaction.atomic():
+            cls.objects.bulk_create(created)
+            cls.objects.bulk_update(updated, update_fields, batch_size=100)
+            data_bulk_saved.send(sender=cls, instances=created + updated)
+        return (created, updated)
+
     @classmethod
     def get_main_fields(cls):
         return [field for field in Data.MAIN_FIELDS]
@@ -563,3 +654,192 @@ class Data(ConversionFieldsModelMixin, models.Model):
     def _get_learning_fields(cls):
         return cls.CHTUID_FIELD + cls.AUXILIARY_FIELDS \
             + cls.get_main_fields()
+
+
+class DataStatistics(models.Model):
+    """
+    Aggregates of the Data of a Unit, kept up to date incrementally as Data
+    is saved or deleted instead of computing them on every page view. The
+    global ones are aggregated from the ones of the Units.
+
+    Changes which bypass the signals (i.e. QuerySet.update()) are not
+    tracked, refresh() recomputes the statistics from the Data.
+    """
+    unit = models.OneToOneField(
+        "units.Unit",
+        on_delete=models.CASCADE,
+        primary_key=True,
+        verbose_name=_("Unit"),
+        related_name='data_statistics'
+    )
+    data_count = models.IntegerField(
+        _("Data Count"),
+        default=0
+    )
+    finished_count = models.IntegerField(
+        _("Finished Data Count"),
+        default=0
+    )
+    last_timestamp = models.DateTimeField(
+        _("Last Data Timestamp"),
+        blank=True, null=True
+    )
+
+    class Meta:
+        verbose_name = _("Data Statistics")
+        verbose_name_plural = _("Data Statistics")
+
+    def __str__(self):
+        return "{0}: {1} ({2})".format(
+            self.unit_id, self.data_count, self.finished_count
+        )
+
+    @classmethod
+    def get_global(cls):
+        """
+        Returns the (unsaved) statistics of all the Data.
+        """
+        return cls(**cls.objects.aggregate(
+            data_count=Coalesce(Sum('data_count'), 0),
+            finished_count=Coalesce(Sum('finished_count'), 0),
+            last_timestamp=Max('last_timestamp'),
+        ))
+
+    @classmethod
+    def get_for_unit(cls, unit):
+        """
+        Returns the statistics of the Data of the unit.
+        """
+        try:
+            return cls.objects.get(unit=unit)
+        except cls.DoesNotExist:
+            return cls(unit=unit)
+
+    @classmethod
+    def refresh(cls, unit_ids=None):
+        """
+        Recomputes the statistics of the units (all of them if not
+        provided) from the Data.
+        """
+        queryset = Data.objects.order_by()
+        if unit_ids is not None:
+            queryset = queryset.filter(unit_id__in=unit_ids)
+        aggregates = queryset.values('unit_id').annotate(
+            data_count=Count('pk'),
+            finished_count=Count('pk', filter=Q(is_finished=True)),
+            last_timestamp=Max('timestamp'),
+        )
+        found = set()
+        for row in aggregates:
+            unit_id = row.pop('unit_id')
+            cls.objects.update_or_create(unit_id=unit_id, defaults=row)
+            found.add(unit_id)
+        # Units without Data
+        stale = cls.objects.exclude(unit_id__in=found)
+        if unit_ids is not None:
+            stale = stale.filter(unit_id__in=unit_ids)
+        stale.delete()
+        fragment_cache.renew('data')
+
+    @classmethod
+    def add(cls, unit_id, count, finished, timestamp=None):
+        """
+        Adds the amounts of Data (and finished Data) to the statistics of
+        the unit, along with the last timestamp of them if provided.
+        """
+        updates = {
+            'data_count': F('data_count') + count,
+            'finished_count': F('finished_count') + finished,
+        }
+        if timestamp is not None:
+            updates['last_timestamp'] = Greatest(
+                Coalesce('last_timestamp', Value(timestamp)), Value(timestamp)
+            )
+        if not cls.objects.filter(unit_id=unit_id).update(**updates):
+            # Not tracked yet, the Data is already in the database
+            cls.refresh([unit_id])
+
+    @classmethod
+    def remove(cls, unit_id, finished, timestamp):
+        """
+        Removes a Data from the statistics of the unit.
+        """
+        cls.add(unit_id, -1, -int(finished))
+        # Only if it was the last one, with the index on (unit, timestamp)
+        cls.objects.filter(
+            unit_id=unit_id, last_timestamp__lte=timestamp
+        ).update(
+            last_timestamp=Subquery(
+                Data.objects.filter(unit_id=unit_id)
+                .order_by('-timestamp').values('timestamp')[:1]
+            )
+        )
+
+    @classmethod
+    def record_saved(cls, instance, created=False):
+        current = instance.get_statistics_values()
+        previous = getattr(instance, '_statistics_values', None)
+        instance._statistics_values = current
+        if not created:
+            if previous is None:
+                # Saved without being loaded, the previous values are unknown
+                cls.refresh([instance.unit_id])
+                return
+            if previous == current:
+                return
+            cls.remove(*previous)
+        cls.add(current[0], 1, int(current[1]), current[2])
+
+    @classmethod
+    def record_bulk_saved(cls, instances):
+        """
+        Records the Data saved in bulk with a query per unit, considering
+        as created the ones which were not loaded from the database.
+        """
+        deltas, changed = {}, set()
+        for instance in instances:
+            current = instance.get_statistics_values()
+            previous = getattr(instance, '_statistics_values', None)
+            instance._statistics_values = current
+            if previous is None:
+                count, finished, timestamp = \
+                    deltas.get(current[0], (0, 0, current[2]))
+                deltas[current[0]] = (
+                    count + 1, finished + int(current[1]),
+                    max(timestamp, current[2])
+                )
+            elif previous != current:
+                changed.update({previous[0], current[0]})
+        for unit_id, delta in deltas.items():
+            if unit_id not in changed:
+                cls.add(unit_id, *delta)
+        if changed:
+            cls.refresh(changed)
+
+
+def data_statistics_saved(sender, instance, created, **kwargs):
+    DataStatistics.record_saved(instance, created)
+
+
+def data_statistics_deleted(sender, instance, **kwargs):
+    previous = getattr(instance, '_statistics_values', None) \
+        or instance.get_statistics_values()
+    DataStatistics.remove(*previous)
+
+
+def data_statistics_bulk_saved(sender, instances, **kwargs):
+    DataStatistics.record_bulk_saved(instances)
+
+
+post_save.connect(data_statistics_saved, sender=Data)
+post_delete.connect(data_statistics_deleted, sender=Data)
+data_bulk_saved.connect(data_statistics_bulk_saved, sender=Data)
+
+
+def renew_data_fragments(sender, **kwargs):
+    fragment_cache.renew('data')
+
+
+post_save.connect(renew_data_fragments, sender=Data)
+post_delete.connect(renew_data_fragments, sender=Data)
+data_bulk_saved.connect(renew_data_fragments, sender=Data)
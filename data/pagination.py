@@ -0,0 +1,143 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from datetime import datetime
+
+from django.db.models import Q
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework.exceptions import ParseError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def encode_cursor(data, reverse=False):
+    position = "{0}|{1}|{2}".format(
+        data.timestamp.isoformat(), data.id, "r" if reverse else ""
+    )
+    return urlsafe_b64encode(position.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        position = urlsafe_b64decode(cursor.encode()).decode()
+        timestamp, pk, reverse = position.split("|")
+        return (datetime.fromisoformat(timestamp), int(pk), bool(reverse))
+    except (BinasciiError, UnicodeDecodeError) as e:
+        raise ValueError(e)
+
+
+class KeysetPage:
+    """
+    Page of Data with the cursors of the next and previous pages (None if
+    there are not).
+    """
+    def __init__(self, object_list, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+def paginate_keyset(queryset, cursor, page_size):
+    """
+    Returns the page of the Data queryset - in the (-timestamp, -id) order -
+    after the cursor (or before it, for the ones of previous pages), the
+    first one if no cursor is provided. Each page is a range scan of the
+    indexes on timestamp, without OFFSETs nor COUNTs. Raises ValueError on
+    invalid cursors.
+    """
+    reverse = False
+    queryset = queryset.order_by('-timestamp', '-id')
+    if cursor:
+        timestamp, pk, reverse = decode_cursor(cursor)
+        if reverse:
+            queryset = queryset.filter(
+                Q(timestamp__gt=timestamp) | Q(timestamp=timestamp, id__gt=pk)
+            ).order_by('timestamp', 'id')
+        else:
+            queryset = queryset.filter(
+                Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, id__lt=pk)
+            )
+    records = list(queryset[:page_size + 1])
+    more = len(records) > page_size
+    records = records[:page_size]
+    if reverse:
+        records.reverse()
+        has_next, has_previous = (True, more)
+    else:
+        has_next, has_previous = (more, bool(cursor))
+    if not records:
+        return KeysetPage(records, None, None)
+    return KeysetPage(
+        records,
+        encode_cursor(records[-1]) if has_next else None,
+        encode_cursor(records[0], reverse=True) if has_previous else None
+    )
+
+
+class KeysetResultsSetPagination(BasePagination):
+    """
+    Keyset (cursor) pagination of Data for the REST API, see
+    paginate_keyset.
+    """
+    page_size = 25
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    cursor_query_param = 'cursor'
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        try:
+            self.page = paginate_keyset(
+                queryset, request.query_params.get(self.cursor_query_param),
+                self.get_page_size(request)
+            )
+        except ValueError:
+            raise ParseError(_("Invalid cursor."))
+        return list(self.page)
+
+    def get_link(self, cursor):
+        if cursor is None:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.cursor_query_param, cursor
+        )
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_link(self.page.next_cursor),
+            'previous': self.get_link(self.page.previous_cursor),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
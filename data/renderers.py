@@ -1,4 +1,8 @@
 #
+import json
+
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils import encoders
 from rest_framework_csv.renderers import CSVRenderer
 
 from .serializers import PublicDataSerializer
@@ -6,3 +10,22 @@ from .serializers import PublicDataSerializer
 
 class PublicCSVRenderer(CSVRenderer):
     header = [field for field in PublicDataSerializer().fields]
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Renders newline-delimited JSON: an item (of a list) per line.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    @staticmethod
+    def render_line(item):
+        return json.dumps(item, cls=encoders.JSONEncoder) + "\n"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if not isinstance(data, list):
+            data = [data]
+        return "".join(self.render_line(item) for item in data).encode()
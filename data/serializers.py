@@ -4,7 +4,7 @@ from django.db import models
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 
-from rest_framework import serializers
+from rest_framework import serializers, status
 from rest_framework.fields import BooleanField
 from rest_framework.exceptions import ValidationError as DRFValidationError
 
@@ -35,7 +35,7 @@ class PublicDataSerializer(UseNullableBooleanFieldMixin,
             ] + model.get_main_fields()
 
     def get_unit(self, obj):
-        return obj.unit.pk
+        return obj.unit_id
 
     def get_timestamp(self, obj):
         return obj.timestamp.strftime("%Y-%m-%d %H:%M")
@@ -54,20 +54,36 @@ class DataListSerializer(PublicDataSerializer):
 
 class ModelValidatedModelSerializer(UseNullableBooleanFieldMixin,
                                     serializers.ModelSerializer):
+    """
+    Validates the data with the rules of the model (clean_values), filling
+    the missing fields which have a default as the model would.
+    """
+    # Fields of the model with a default, as (attname, field)
+    default_fields = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        meta = getattr(cls, 'Meta', None)
+        if meta is not None and hasattr(meta, 'model'):
+            cls.default_fields = tuple(
+                (field.attname, field)
+                for field in meta.model._meta.concrete_fields
+                if field.has_default()
+            )
 
     def validate(self, data):
-        model_obj = self.Meta.model(**data)
         try:
-            model_obj.clean()
-            for field in model_obj._meta.fields:
-                field_value = getattr(model_obj, field.attname, None)
-                if field_value:
-                    data[field.attname] = field_value
+            self.Meta.model.clean_values(data)
         except DjangoValidationError as exc:
             drf_error = DRFValidationError(
                 detail=serializers.as_serializer_error(exc)
             )
             raise drf_error
+        for attname, field in self.default_fields:
+            if attname not in data:
+                default = field.get_default()
+                if default:
+                    data[attname] = default
         return data
 
 
@@ -79,20 +95,22 @@ class DataClassificationSerializer(ModelValidatedModelSerializer):
             'is_finished',
         ]
 
+    clinical_fields = tuple(
+        Meta.model.get_main_fields() + Meta.model.get_conversion_fields()
+    )
+
     def validate(self, data):
         cleaned_data = super().validate(data)
-        clinical_fields_count = 0
         threshold = getattr(settings, 'CLINICAL_FIELDS_MIN_NUM_SUBMIT', 6)
-        clinical_fields = self.Meta.model.get_main_fields() + \
-            self.Meta.model.get_conversion_fields()
-        for field in clinical_fields:
-            if cleaned_data.get(field, None):
-                clinical_fields_count += 1
+        clinical_fields_count = sum(
+            1 for field in self.clinical_fields
+            if cleaned_data.get(field, None)
+        )
         if clinical_fields_count < threshold:
             raise serializers.ValidationError(
                 _("At least %(threshold)s clinical fields must be "
-                  "submitted in order to classify a clinical result." %
-                    {'threshold': threshold}),
+                  "submitted in order to classify a clinical result.") %
+                {'threshold': threshold},
                 code="not_enough_fields",
             )
         return cleaned_data
@@ -115,8 +133,49 @@ class DataInputSerializer(ModelValidatedModelSerializer):
         return reverse('rest-api:data-ru', args=[obj.uuid, ])
 
 
+class DataBulkInputSerializer(DataInputSerializer):
+    """
+    Input of Data in bulk, where the uniqueness of the uuids is checked by
+    the callers for all the records at once instead of with a query per
+    record.
+    """
+
+    class Meta(DataInputSerializer.Meta):
+        extra_kwargs = {'uuid': {'validators': []}}
+
+
 class DataShareSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Data
-        exclude = ['id', 'user', 'unit', 'unit_ii', ]
+        exclude = ['id', 'user', 'unit', 'unit_ii', 'last_updated', ]
+
+
+def validate_shared_records(records,
+                            serializer_class=DataBulkInputSerializer):
+    """
+    Validates a list of records shared from the network, returns a list with
+    the status of each record by uuid - None for the valid ones - and a dict
+    with the validated data of the valid ones by uuid. Records originated
+    in the current node are not considered valid (already reported).
+    """
+    results, validated = [], {}
+    for record in records:
+        serializer = serializer_class(data=record)
+        if not serializer.is_valid():
+            results.append({
+                'uuid': record.get('uuid', None)
+                if isinstance(record, dict) else None,
+                'status': status.HTTP_400_BAD_REQUEST,
+                'errors': serializer.errors
+            })
+            continue
+        uuid = str(serializer.validated_data['uuid'])
+        if serializer.validated_data['chtuid'] == settings.CHTUID:
+            results.append({
+                'uuid': uuid, 'status': status.HTTP_208_ALREADY_REPORTED
+            })
+        else:
+            validated[uuid] = serializer.validated_data
+            results.append({'uuid': uuid, 'status': None})
+    return (results, validated)
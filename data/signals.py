@@ -0,0 +1,7 @@
+#
+from django.dispatch import Signal
+
+
+# Sent after Data records are created or updated in bulk - which does not
+# trigger post_save - providing the records as ``instances``
+data_bulk_saved = Signal()
@@ -0,0 +1,101 @@
+from collections import namedtuple
+
+from django.utils.translation import gettext_lazy as _
+
+from .models import Data
+
+
+Column = namedtuple('Column', ['name', 'verbose_name', 'formatter'])
+
+
+def format_value(value):
+    """
+    Returns the value as displayed in the tables of the HTML front-end.
+    """
+    if value is None:
+        return str(_("Not Available"))
+    if isinstance(value, bool):
+        return str(_("Yes") if value else _("No"))
+    return str(value)
+
+
+def format_datetime(value):
+    if value is None:
+        return format_value(value)
+    return value.strftime("%Y-%m-%d %H:%M")
+
+
+def get_column_formatter(field):
+    """
+    Returns the function which formats the values of a field of Data for
+    displaying, resolving what depends on the field (the display of its
+    choices or its type) beforehand.
+    """
+    if field.choices:
+        choices = dict(field.flatchoices)
+
+        def format_choice(value):
+            return format_value(choices.get(value, value))
+
+        return format_choice
+    if "Date" in field.get_internal_type():
+        return format_datetime
+    return format_value
+
+
+class DataTable:
+    """
+    Table of Data for the HTML front-end.
+
+    Its columns - the fields of Data not excluded, with the formatters of
+    their values - are computed once. Pages are fetched as named tuples of
+    ``values_fields`` (see ``get_queryset``), which are formatted in bulk
+    by ``render_rows`` into (record, cells) pairs for the templates.
+    ``extra`` fields are fetched for the templates but not formatted.
+    """
+    def __init__(self, exclude=(), extra=()):
+        self.columns = tuple(
+            Column(
+                field.attname, field.verbose_name, get_column_formatter(field)
+            )
+            for field in Data._meta.fields if field.attname not in exclude
+        )
+        # The keyset pagination needs 'timestamp' and 'id'
+        self.values_fields = tuple(dict.fromkeys(
+            ('id', 'timestamp', ) + tuple(extra) +
+            tuple(column.name for column in self.columns)
+        ))
+        self.formatters = tuple(
+            (self.values_fields.index(column.name), column.formatter)
+            for column in self.columns
+        )
+
+    def __len__(self):
+        return len(self.columns)
+
+    def get_queryset(self, queryset):
+        return queryset.values_list(*self.values_fields, named=True)
+
+    def render_rows(self, records):
+        formatters = self.formatters
+        return [
+            (
+                record,
+                [formatter(record[index]) for index, formatter in formatters]
+            )
+            for record in records
+        ]
+
+
+PUBLIC_DATA_TABLE = DataTable(
+    exclude=(
+        'id', 'user_id', 'unit_ii', 'timestamp', 'unit', 'uuid',
+        'last_updated',
+    ),
+    extra=('unit_id', 'uuid', ),
+)
+
+UNIT_DATA_TABLE = DataTable(
+    exclude=('id', 'unit_id', 'user_id', 'uuid', 'last_updated', ),
+    extra=('uuid', 'user_id', 'user__first_name', 'user__last_name', ),
+)
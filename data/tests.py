@@ -1,28 +1,43 @@
 from copy import deepcopy
+from datetime import timedelta
 from decimal import Decimal
 from importlib import reload
 from io import StringIO
 import json
 import numpy as np
+import os
 import random
+import tempfile
 
 from django.contrib.auth.models import Permission
 from django.core.exceptions import ValidationError
-from django.test import SimpleTestCase, Client
+from django.db import connection
+from django.db.models import Max
+from django.test import SimpleTestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.urls import reverse
+from django.utils import timezone
 
 from django_ai.supervised_learning.models import SupervisedLearningTechnique
+import pyarrow as pa
+import pyarrow.parquet as pq
 
 from base.models import CurrentClassifier, DecisionTree, User
 import data.forms as data_forms
 from units.models import Unit
 
-from .models import Data
+from .models import Data, DataStatistics
+from .pagination import paginate_keyset
 from .serializers import (DataInputSerializer, DataListSerializer, )
+from .tables import DataTable
 from .utils import get_simulated_data
 
 
+@override_settings(CACHES={'default': {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+}})
 class TestData(SimpleTestCase):
     databases = "__all__"
 
@@ -268,7 +283,49 @@ class TestData(SimpleTestCase):
             "attachment; filename=covid-ht-data-",
             response.get('Content-Disposition')
         )
-        self.assertEqual(response.content, bytes(expected_response, 'utf-8'))
+        self.assertEqual(
+            b''.join(response.streaming_content),
+            bytes(expected_response, 'utf-8')
+        )
+
+    def test_columnar(self):
+        Data.objects.all().delete()
+        data, _ = Data.objects.get_or_create(
+            user=self.user, unit=self.unit,
+            is_covid19=False, rbc=3.5, wbc=5.5, plt=220, neut=1.2,
+            is_finished=True
+        )
+        # -> Test Restricted Access
+        self.client.logout()
+        response = self.client.get(reverse("data:parquet"))
+        self.assertEqual(response.status_code, 403)
+        # -> Test Parquet
+        self.client.force_login(user=self.user)
+        response = self.client.get(reverse("data:parquet"))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            "attachment; filename=\"covid-ht-data-",
+            response.get('Content-Disposition')
+        )
+        table = pq.read_table(
+            pa.BufferReader(b''.join(response.streaming_content))
+        )
+        self.assertEqual(table.column_names[:5],
+                         ['chtuid', 'unit', 'timestamp', 'uuid', 'is_covid19'])
+        self.assertEqual(table.schema.field('rbc').type, pa.float64())
+        row = table.to_pylist()[0]
+        self.assertEqual(row['uuid'], str(data.uuid))
+        self.assertEqual(row['unit'], self.unit.pk)
+        self.assertEqual(row['rbc'], 3.5)
+        self.assertEqual(row['plt'], 220)
+        self.assertIsNone(row['hgb'])
+        # -> Test Arrow IPC
+        response = self.client.get(reverse("data:arrow"))
+        self.assertEqual(response.status_code, 200)
+        table = pa.ipc.open_file(
+            pa.BufferReader(b''.join(response.streaming_content))
+        ).read_all()
+        self.assertEqual(table.num_rows, 1)
 
     def test_detail(self):
         self.client.force_login(user=self.user)
@@ -349,6 +406,24 @@ class TestData(SimpleTestCase):
             data.is_finished = True
             data.clean()
 
+    def test_data_clean_values(self):
+        Data.clean_values({'rbc': 3.1, 'lymp_Upercentage_Rwbc': 10, 'wbc': 5})
+        with self.assertRaises(ValidationError):
+            Data.clean_values({'rbc': 3.1, 'lymp_Upercentage_Rwbc': 10})
+        with self.assertRaises(ValidationError):
+            Data.clean_values({'is_finished': True, 'rbc': 3.1})
+        serializer = DataInputSerializer(
+            data={'rbc': 3.1, 'lymp_Upercentage_Rwbc': 10}
+        )
+        self.assertFalse(serializer.is_valid())
+        self.assertTrue('wbc' in serializer.errors)
+        serializer = DataInputSerializer(data={'rbc': 3.1, 'chtuid': ''})
+        self.assertTrue(serializer.is_valid())
+        # Defaults of the model are filled
+        self.assertTrue(serializer.validated_data['uuid'])
+        self.assertTrue(serializer.validated_data['timestamp'])
+        self.assertEqual(serializer.validated_data['chtuid'], '')
+
     def test_data_classification_form_fields_setting(self):
         with self.settings(
                 DATA_CLASSIFICATION_FORM_FIELDS=['rbc', 'hgb', 'hgb_UmmolL']
@@ -380,6 +455,33 @@ class TestData(SimpleTestCase):
             self.assertTrue('rbc' in data_forms.DataInputForm().fields)
             self.assertTrue('wbc' not in data_forms.DataInputForm().fields)
 
+    def test_grouped_fields_form(self):
+        with self.settings(
+                DATA_INPUT_FORM_FIELDS=['rbc', 'hgb', 'hgb_UmmolL']
+                ):
+            reload(data_forms)
+            form_class = data_forms.DataInputForm
+            groups = form_class.get_fields_groups()
+            self.assertIs(form_class.get_fields_groups(), groups)
+            self.assertIn(['rbc'], groups)
+            self.assertIn('hgb_UmmolL', [f for g in groups for f in g])
+            self.assertEqual(form_class().get_grouped_fields(), groups)
+            # Pristine forms are rendered once
+            form = form_class()
+            self.assertTrue(form.is_pristine)
+            html = form.render_grouped_fields()
+            self.assertIn('name="rbc"', html)
+            self.assertIs(form_class().render_grouped_fields(), html)
+            # Bound forms or with instances are rendered each time
+            form = form_class({'rbc': 'x'})
+            self.assertFalse(form.is_pristine)
+            self.assertIn('value="x"', form.render_grouped_fields())
+            data = Data(rbc=Decimal('4.5'))
+            form = form_class(instance=data)
+            self.assertFalse(form.is_pristine)
+            self.assertIn('value="4.5"', form.render_grouped_fields())
+        reload(data_forms)
+
     def test_data_apply_conversion_fields_rules_to_dict(self):
         data = {
             'rbc': Decimal('3.5'),
@@ -398,6 +500,67 @@ class TestData(SimpleTestCase):
         result = Data.apply_conversion_fields_rules_to_dict(data)
         self.assertEqual(expected_result, result)
 
+    def test_data_apply_conversion_fields_rules_to_dataset(self):
+        dataset = [
+            {
+                'rbc': Decimal('3.5'),
+                'wbc': Decimal(3),
+                'hgb_UmmolL': Decimal(2),
+                'lymp_Upercentage_Rwbc': Decimal(10)
+            },
+            {'rbc': Decimal('4.1'), 'wbc': Decimal(5)},
+            {'wbc': Decimal(4), 'lymp_Upercentage_Rwbc': Decimal(20)},
+        ]
+        result = Data.apply_conversion_fields_rules_to_dataset(dataset)
+        expected = [
+            Data.apply_conversion_fields_rules_to_dict(d) for d in dataset
+        ]
+        self.assertEqual(len(result), len(expected))
+        for observation, expected_observation in zip(result, expected):
+            self.assertEqual(observation.keys(), expected_observation.keys())
+            for field, value in expected_observation.items():
+                self.assertAlmostEqual(float(observation[field]), float(value))
+        self.assertIsInstance(result[0]['hgb'], float)
+        self.assertTrue('hgb' not in dataset[0])
+        self.assertEqual(
+            Data.apply_conversion_fields_rules_to_dataset([]), []
+        )
+
+    def test_data_conversion_plan(self):
+        plan = Data.get_conversion_plan()
+        self.assertIs(plan, Data.get_conversion_plan())
+        self.assertEqual(
+            [rule.source for rule in plan], Data.get_conversion_fields()
+        )
+        rules = {rule.source: rule for rule in plan}
+        self.assertEqual(rules['hgb_UmmolL'].target, 'hgb')
+        self.assertIsNone(rules['hgb_UmmolL'].relative_to)
+        self.assertEqual(rules['lymp_Upercentage_Rwbc'].target, 'lymp')
+        self.assertEqual(rules['lymp_Upercentage_Rwbc'].relative_to, 'wbc')
+        self.assertEqual(
+            rules['lymp_Upercentage_Rwbc'].function(
+                Decimal(10), Decimal(3)
+            ),
+            Decimal('0.3')
+        )
+
+    def test_data_apply_conversion_fields_rules_to_columns(self):
+        columns = {
+            'rbc': [Decimal('3.5'), Decimal('4.1'), None],
+            'wbc': np.array([3, 5, 4], dtype=float),
+            'hgb': [None, Decimal(130), None],
+            'hgb_UmmolL': [Decimal(2), None, None],
+            'lymp_Upercentage_Rwbc': [Decimal(10), None, Decimal(20)],
+        }
+        result = Data.apply_conversion_fields_rules_to_columns(columns)
+        np.testing.assert_allclose(result['hgb'], [3.24, 130, np.nan])
+        np.testing.assert_allclose(result['lymp'], [0.3, np.nan, 0.8])
+        self.assertIs(result['wbc'], columns['wbc'])
+        result = Data.apply_conversion_fields_rules_to_columns(
+            {'rbc': [Decimal(3)]}
+        )
+        self.assertTrue('hgb' not in result)
+
     def test_rest_api_data_list(self):
         data, _ = Data.objects.get_or_create(
             user=self.user, unit=self.unit,
@@ -416,22 +579,129 @@ class TestData(SimpleTestCase):
             )
         self.assertEqual(response.status_code, 403)
 
-    def test_rest_api_data_list_unpaginated(self):
+    def test_rest_api_data_list_ndjson(self):
         data, _ = Data.objects.get_or_create(
             user=self.user, unit=self.unit,
             is_covid19=True, rbc=2, wbc=3, plt=240, neut=1
         )
         with self.settings(DATA_PRIVACY_MODE=False):
             response = self.client.get(
-                reverse("rest-api:data-lc"), {'page': 'no'}
+                reverse("rest-api:data-lc"), {'format': 'ndjson'}
             )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+            with CaptureQueriesContext(connection) as queries:
+                lines = b"".join(response.streaming_content)\
+                    .decode().splitlines()
+            self.assertEqual(len(lines), Data.objects.count())
+            # Rows are not queried for their relations
+            self.assertLessEqual(len(queries), 2)
             serializer = DataListSerializer(data)
-            self.assertEqual(response.data[0], serializer.data)
+            self.assertIn(
+                json.loads(json.dumps(serializer.data)),
+                [json.loads(line) for line in lines]
+            )
         response = self.client.get(
-            reverse("rest-api:data-lc"), {'page': 'no'}
+            reverse("rest-api:data-lc"), {'format': 'ndjson'}
         )
         self.assertEqual(response.status_code, 403)
 
+    def test_rest_api_data_list_pagination(self):
+        self.client.force_login(user=self.user)
+        Data.objects.all().delete()
+        timestamp = timezone.now()
+        for i in range(5):
+            Data.objects.create(
+                user=self.user, unit=self.unit, rbc=2 + i,
+                # Ties are ordered by id
+                timestamp=timestamp - timedelta(minutes=i // 2)
+            )
+        expected = [
+            str(d.uuid) for d in Data.objects.order_by('-timestamp', '-id')
+        ]
+        response = self.client.get(
+            reverse("rest-api:data-lc"), {'page_size': 2}
+        )
+        self.assertIsNone(response.data['previous'])
+        received = [r['uuid'] for r in response.data['results']]
+        pages = [received]
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            pages.append([r['uuid'] for r in response.data['results']])
+            received += pages[-1]
+        self.assertEqual(received, expected)
+        self.assertEqual(len(pages), 3)
+        # Back to the previous page
+        response = self.client.get(response.data['previous'])
+        self.assertEqual(
+            [r['uuid'] for r in response.data['results']], pages[1]
+        )
+        self.assertTrue(response.data['next'])
+        response = self.client.get(response.data['previous'])
+        self.assertEqual(
+            [r['uuid'] for r in response.data['results']], pages[0]
+        )
+        self.assertIsNone(response.data['previous'])
+        # Page sizes are bounded
+        response = self.client.get(
+            reverse("rest-api:data-lc"), {'page_size': 100000}
+        )
+        self.assertEqual(len(response.data['results']), 5)
+        response = self.client.get(
+            reverse("rest-api:data-lc"), {'cursor': 'not-a-cursor'}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_data_table(self):
+        Data.objects.all().delete()
+        data = Data.objects.create(
+            user=self.user, unit=self.unit, is_covid19=True, sex=False,
+            rbc=3, plt=200
+        )
+        table = DataTable(exclude=('id', 'uuid', 'last_updated', ))
+        self.assertEqual(len(table), len(table.columns))
+        self.assertEqual(table.values_fields[:2], ('id', 'timestamp', ))
+        self.assertEqual(
+            len(table.values_fields), len(set(table.values_fields))
+        )
+        [(record, cells)] = table.render_rows(
+            table.get_queryset(Data.objects.all())
+        )
+        self.assertEqual(record.id, data.id)
+        cells = {
+            column.name: cell for column, cell in zip(table.columns, cells)
+        }
+        self.assertEqual(
+            cells['timestamp'], data.timestamp.strftime("%Y-%m-%d %H:%M")
+        )
+        self.assertEqual(cells['is_covid19'], "Yes")
+        self.assertEqual(cells['sex'], "Female")
+        self.assertEqual(cells['rbc'], "3.000")
+        self.assertEqual(cells['plt'], "200")
+        self.assertEqual(cells['wbc'], "Not Available")
+        self.assertEqual(cells['unit_id'], str(self.unit.pk))
+
+    def test_public_list_pagination(self):
+        self.client.force_login(user=self.user)
+        Data.objects.all().delete()
+        for i in range(3):
+            Data.objects.create(
+                user=self.user, unit=self.unit, rbc=2 + i,
+                is_finished=True, is_covid19=False
+            )
+        page = paginate_keyset(Data.objects.all(), None, 2)
+        self.assertTrue(page.has_next())
+        self.assertFalse(page.has_previous())
+        response = self.client.get(
+            reverse("data:public-list"), {'cursor': page.next_cursor}
+        )
+        self.assertEqual(response.status_code, 200)
+        last = paginate_keyset(Data.objects.all(), page.next_cursor, 2)[0]
+        self.assertContains(response, str(last.uuid))
+        response = self.client.get(
+            reverse("data:public-list"), {'cursor': 'not-a-cursor'}
+        )
+        self.assertEqual(response.status_code, 200)
 
     def test_rest_api_data_creation(self):
         self.client.force_login(user=self.user)
@@ -625,6 +895,306 @@ class TestData(SimpleTestCase):
         )
         self.assertEqual(response.status_code, 208)
 
+    def test_rest_api_network_sharing_bulk(self):
+        self.client.force_login(user=self.user)
+        Data.objects.create(
+            uuid='4e9b03f7-96bf-4386-1111-bdbe7aef1691',
+            user=self.user, unit=self.unit, chtuid='abc01', rbc=2
+        )
+        Data.objects.create(
+            uuid='4e9b03f7-96bf-4386-1112-bdbe7aef1691',
+            user=self.user, unit=self.unit,
+        )
+        record = {
+            'chtuid': 'abc01',
+            'rbc': "3",
+            'plt': "150",
+            'wbc': "3",
+            'lymp_Upercentage_Rwbc': "15",
+        }
+        put_data = [
+            # Update
+            dict(record, uuid='4e9b03f7-96bf-4386-1111-bdbe7aef1691'),
+            # Creation
+            dict(record, uuid='4e9b03f7-96bf-4386-1113-bdbe7aef1691'),
+            # Echo from the network
+            dict(record, uuid='4e9b03f7-96bf-4386-1112-bdbe7aef1691',
+                 chtuid='cHT00'),
+            # Invalid
+            {'chtuid': 'abc01', 'uuid': '4e9b03f7-96bf-4386-1114-bdbe7aef1691',
+             'lymp_Upercentage_Rwbc': "15"},
+        ]
+        response = self.client.put(
+            reverse("rest-api:data-bulk"),
+            put_data,
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(r['uuid'], r['status']) for r in response.data],
+            [('4e9b03f7-96bf-4386-1111-bdbe7aef1691', 200),
+             ('4e9b03f7-96bf-4386-1113-bdbe7aef1691', 201),
+             ('4e9b03f7-96bf-4386-1112-bdbe7aef1691', 208),
+             ('4e9b03f7-96bf-4386-1114-bdbe7aef1691', 400)]
+        )
+        self.assertIn('wbc', response.data[3]['errors'])
+        data = Data.objects.get(uuid='4e9b03f7-96bf-4386-1111-bdbe7aef1691')
+        self.assertEqual(data.rbc, Decimal("3"))
+        # Conversion rules are applied
+        self.assertEqual(data.lymp, Decimal("0.45"))
+        data = Data.objects.get(uuid='4e9b03f7-96bf-4386-1113-bdbe7aef1691')
+        self.assertEqual(data.lymp, Decimal("0.45"))
+        self.assertEqual(data.unit, self.unit)
+        self.assertFalse(
+            Data.objects.filter(
+                uuid='4e9b03f7-96bf-4386-1114-bdbe7aef1691').exists()
+        )
+        # Only lists are accepted
+        response = self.client.put(
+            reverse("rest-api:data-bulk"),
+            record,
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+        with self.settings(DATA_BULK_MAX_SIZE=1):
+            response = self.client.put(
+                reverse("rest-api:data-bulk"),
+                put_data,
+                content_type='application/json'
+            )
+        self.assertEqual(response.status_code, 400)
+        self.client.logout()
+        response = self.client.put(
+            reverse("rest-api:data-bulk"),
+            put_data,
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 403)
+        self.client.force_login(user=self.user)
+
+    def test_rest_api_data_import(self):
+        self.client.force_login(user=self.user)
+        csv_file = StringIO(
+            "unit_ii,rbc,wbc,hgb_UmmolL,lymp_Upercentage_Rwbc\n"
+            "test_data_import_1,3,5,2,15\n"
+            "test_data_import_2,4,,,\n"
+            "test_data_import_3,33,5,,\n"
+            "test_data_import_4,3,,,15\n"
+        )
+        csv_file.name = "data.csv"
+        response = self.client.post(
+            reverse("rest-api:data-import"), {'file': csv_file}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(
+            [error['record'] for error in response.data['errors']], [3, 4]
+        )
+        self.assertIn('rbc', response.data['errors'][0]['errors'])
+        self.assertIn('wbc', response.data['errors'][1]['errors'])
+        data = Data.objects.get(unit_ii="test_data_import_1")
+        # Conversion rules are applied
+        self.assertEqual(data.hgb, 3)
+        self.assertEqual(data.lymp, Decimal("0.75"))
+        self.assertEqual(data.user, self.user)
+        self.assertEqual(data.unit, self.unit)
+        data = Data.objects.get(unit_ii="test_data_import_2")
+        self.assertEqual(data.rbc, Decimal("4"))
+        self.assertIsNone(data.hgb)
+        # JSONL, by parameter
+        jsonl_file = StringIO(
+            json.dumps({'unit_ii': "test_data_import_5",
+                        'uuid': str(data.uuid), 'rbc': 3}) + "\n\n"
+            + json.dumps({'unit_ii': "test_data_import_5", 'rbc': 3}) + "\n"
+            + "[1, 2]\n"
+        )
+        jsonl_file.name = "data.txt"
+        response = self.client.post(
+            reverse("rest-api:data-import") + "?file_format=jsonl",
+            {'file': jsonl_file}
+        )
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(
+            [error['record'] for error in response.data['errors']], [1, 3]
+        )
+        self.assertIn('uuid', response.data['errors'][0]['errors'])
+        # Not supported formats
+        other_file = StringIO("")
+        other_file.name = "data.txt"
+        response = self.client.post(
+            reverse("rest-api:data-import"), {'file': other_file}
+        )
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(reverse("rest-api:data-import"), {})
+        self.assertEqual(response.status_code, 400)
+        self.client.logout()
+        response = self.client.post(reverse("rest-api:data-import"), {})
+        self.assertEqual(response.status_code, 403)
+        self.client.force_login(user=self.user)
+
+    def test_import_data_command(self):
+        out, err = StringIO(), StringIO()
+        with tempfile.NamedTemporaryFile(
+                mode='w', suffix='.jsonl', delete=False) as file:
+            file.write(json.dumps(
+                {'unit_ii': "test_import_data_command", 'rbc': 3,
+                 'mchc_UgdL': 30}
+            ) + "\n")
+            file.write(json.dumps({'rbc': 33}) + "\n")
+        try:
+            call_command(
+                'import_data', file.name, '--user', self.user.username,
+                stdout=out, stderr=err
+            )
+        finally:
+            os.remove(file.name)
+        self.assertIn('1 observations, 1 errors', out.getvalue())
+        self.assertIn('Record 2', err.getvalue())
+        data = Data.objects.get(unit_ii="test_import_data_command")
+        self.assertEqual(data.mchc, 3)
+        with self.assertRaises(CommandError):
+            call_command('import_data', 'data.csv', '--user', 'nobody')
+        with self.assertRaises(CommandError):
+            call_command(
+                'import_data', 'data.txt', '--user', self.user.username
+            )
+
+    def test_benchmark_data_queries_command(self):
+        out = StringIO()
+        call_command(
+            'benchmark_data_queries', '--populate', '20', '--repeat', '1',
+            stdout=out
+        )
+        self.assertIn('Successfully created benchmark data', out.getvalue())
+        self.assertIn('-> lookup_by_uuid', out.getvalue())
+        call_command('benchmark_data_queries', '--remove', stdout=out)
+        self.assertIn('Successfully removed benchmark data', out.getvalue())
+        self.assertFalse(
+            Data.objects.filter(user__username="benchmark").exists()
+        )
+        with self.assertRaises(CommandError):
+            call_command('benchmark_data_queries', stdout=out)
+        call_command('benchmark_data_queries', '--remove', stdout=out)
+
+    def assertDataStatistics(self, unit):
+        statistics = DataStatistics.get_for_unit(unit)
+        data = Data.objects.filter(unit=unit)
+        self.assertEqual(statistics.data_count, data.count())
+        self.assertEqual(
+            statistics.finished_count, data.filter(is_finished=True).count()
+        )
+        self.assertEqual(
+            statistics.last_timestamp,
+            data.aggregate(last=Max('timestamp'))['last']
+        )
+
+    def test_data_statistics(self):
+        unit, _ = Unit.objects.get_or_create(name="Unit for statistics")
+        DataStatistics.objects.filter(unit=unit).delete()
+        # Creation
+        data = Data.objects.create(user=self.user, unit=unit, rbc=3)
+        self.assertDataStatistics(unit)
+        Data.objects.create(
+            user=self.user, unit=unit, rbc=3, is_finished=True,
+            is_covid19=False, timestamp=data.timestamp - timedelta(days=1)
+        )
+        self.assertDataStatistics(unit)
+        # Update
+        data = Data.objects.get(pk=data.pk)
+        data.is_covid19 = True
+        data.is_finished = True
+        data.timestamp -= timedelta(days=2)
+        data.save()
+        self.assertDataStatistics(unit)
+        # Not loaded from the database
+        Data(
+            pk=data.pk, uuid=data.uuid, user=self.user, unit=unit, rbc=4
+        ).save()
+        self.assertDataStatistics(unit)
+        # Moving to another unit
+        data = Data.objects.get(pk=data.pk)
+        data.unit = self.unit
+        data.save()
+        self.assertDataStatistics(unit)
+        self.assertDataStatistics(self.unit)
+        # Bulk
+        created, updated = Data.bulk_upsert(
+            {str(data.uuid): {'rbc': Decimal(5)},
+             '4e9b03f7-96bf-4386-2222-bdbe7aef1691': {'rbc': Decimal(5)}},
+            self.user, unit
+        )
+        self.assertEqual((len(created), len(updated)), (1, 1))
+        self.assertDataStatistics(unit)
+        self.assertDataStatistics(self.unit)
+        # Deletion
+        Data.objects.filter(unit=unit).order_by('timestamp').last().delete()
+        self.assertDataStatistics(unit)
+        Data.objects.filter(unit=unit).delete()
+        self.assertDataStatistics(unit)
+        self.assertEqual(DataStatistics.get_for_unit(unit).data_count, 0)
+        # Global
+        statistics = DataStatistics.get_global()
+        self.assertEqual(statistics.data_count, Data.objects.count())
+        self.assertEqual(
+            statistics.last_timestamp,
+            Data.objects.aggregate(last=Max('timestamp'))['last']
+        )
+        # Refresh
+        DataStatistics.objects.filter(unit=self.unit).update(data_count=0)
+        DataStatistics.refresh()
+        self.assertDataStatistics(self.unit)
+        unit.delete()
+
+    def test_rest_api_data_sync(self):
+        self.client.force_login(user=self.user)
+        Data.objects.all().delete()
+        for i in range(3):
+            Data.objects.create(user=self.user, unit=self.unit, rbc=2 + i)
+        # -> Test recent changes are held back
+        response = self.client.get(reverse("rest-api:data-lc"), {'sync': ''})
+        self.assertEqual(response.data['results'], [])
+        self.assertFalse(response.data['cursor'])
+        with self.settings(DATA_SYNC_PAGE_SIZE=2, DATA_SYNC_LAG=0):
+            response = self.client.get(
+                reverse("rest-api:data-lc"), {'sync': ''}
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data['results']), 2)
+            self.assertTrue(response.data['more'])
+            received = [r['uuid'] for r in response.data['results']]
+            response = self.client.get(
+                reverse("rest-api:data-lc"),
+                {'sync': response.data['cursor']}
+            )
+            self.assertEqual(len(response.data['results']), 1)
+            self.assertFalse(response.data['more'])
+            received += [r['uuid'] for r in response.data['results']]
+            self.assertEqual(
+                sorted(received),
+                sorted(str(d.uuid) for d in Data.objects.all())
+            )
+            # Only changes after the cursor are provided
+            cursor = response.data['cursor']
+            response = self.client.get(
+                reverse("rest-api:data-lc"), {'sync': cursor}
+            )
+            self.assertEqual(response.data['results'], [])
+            self.assertEqual(response.data['cursor'], cursor)
+            data = Data.objects.first()
+            data.rbc = 5
+            data.save()
+            response = self.client.get(
+                reverse("rest-api:data-lc"), {'sync': cursor}
+            )
+            self.assertEqual(
+                [r['uuid'] for r in response.data['results']],
+                [str(data.uuid)]
+            )
+        response = self.client.get(
+            reverse("rest-api:data-lc"), {'sync': 'not-a-cursor'}
+        )
+        self.assertEqual(response.status_code, 400)
+
     def test_rest_api_data_detail(self):
         self.client.force_login(user=self.user)
         data, _ = Data.objects.get_or_create(
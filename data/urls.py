@@ -14,6 +14,14 @@ urlpatterns = [
          views.CSV().as_view(),
          name="csv"
          ),
+    path('parquet',
+         views.Columnar.as_view(file_format='parquet'),
+         name="parquet"
+         ),
+    path('arrow',
+         views.Columnar.as_view(file_format='arrow'),
+         name="arrow"
+         ),
     path('<str:uuid>/edit',
          views.edit,
          name="edit"
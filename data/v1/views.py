@@ -1,21 +1,29 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from datetime import datetime, timedelta
+from uuid import UUID
+
 from django.conf import settings
-from django.http import Http404
+from django.db.models import Q
+from django.http import Http404, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
 
 from rest_framework import generics
 from rest_framework import status
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.parsers import FileUploadParser, MultiPartParser
 from rest_framework.permissions import BasePermission, SAFE_METHODS
 from rest_framework.request import clone_request
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 
+from ..importing import FORMATS, get_file_format, import_file
 from ..models import Data
-from ..serializers import (DataInputSerializer, DataListSerializer, )
-
-
-class StandardResultsSetPagination(PageNumberPagination):
-    page_size = 25
-    page_size_query_param = 'page_size'
-    max_page_size = 10000
+from ..pagination import KeysetResultsSetPagination
+from ..renderers import NDJSONRenderer
+from ..serializers import (DataBulkInputSerializer, DataInputSerializer,
+                           DataListSerializer, DataShareSerializer,
+                           validate_shared_records, )
 
 
 class IsOwnerOrReadOnly(BasePermission):
@@ -98,8 +106,11 @@ class DataListCreateUpdate(
         generics.ListCreateAPIView):
     queryset = Data.objects.all()
     serializer_class = DataInputSerializer
-    pagination_class = StandardResultsSetPagination
+    pagination_class = KeysetResultsSetPagination
     permission_classes = [DataPrivacyMode, ]
+    renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES + [
+        NDJSONRenderer,
+    ]
     lookup_field = 'uuid'
 
     def perform_create(self, serializer):
@@ -118,22 +129,85 @@ class DataListCreateUpdate(
         return False
 
     def list(self, request):
+        if 'sync' in request.query_params:
+            return self.sync(request)
         queryset = self.filter_queryset(self.get_queryset())
+        if request.accepted_renderer.format == NDJSONRenderer.format:
+            return self.stream(queryset)
 
         page = self.paginate_queryset(queryset)
-        if page is not None:
-            serializer = DataListSerializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+        serializer = DataListSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    def stream(self, queryset):
+        """
+        Streams all the records as NDJSON, fetched by chunks of a
+        server-side cursor.
+        """
+        serializer = DataListSerializer()
+        rows = queryset.order_by('-timestamp', '-id').iterator(
+            chunk_size=settings.DATA_EXPORT_CHUNK_SIZE
+        )
+        return StreamingHttpResponse(
+            (NDJSONRenderer.render_line(serializer.to_representation(data))
+             for data in rows),
+            content_type=NDJSONRenderer.media_type
+        )
+
+    def sync(self, request):
+        """
+        Returns the records changed after the cursor provided in the ``sync``
+        parameter (all of them if empty) in the order they were changed,
+        along with the cursor for the next request.
+
+        The records changed in the last DATA_SYNC_LAG seconds are held back:
+        last_updated is set when they are saved, so a transaction which
+        commits after a later one has been provided would otherwise fall
+        behind the cursor and never be synchronized.
+        """
+        cursor = request.query_params.get('sync', None)
+        queryset = Data.objects.filter(
+            last_updated__lt=timezone.now() - timedelta(
+                seconds=settings.DATA_SYNC_LAG
+            )
+        ).order_by('last_updated', 'uuid')
+        if cursor:
+            try:
+                last_updated, uuid = decode_sync_cursor(cursor)
+            except ValueError:
+                return Response(
+                    {'detail': _("Invalid cursor.")},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            queryset = queryset.filter(
+                Q(last_updated__gt=last_updated) |
+                Q(last_updated=last_updated, uuid__gt=uuid)
+            )
+        page_size = settings.DATA_SYNC_PAGE_SIZE
+        records = list(queryset[:page_size + 1])
+        more = len(records) > page_size
+        records = records[:page_size]
+        if records:
+            cursor = encode_sync_cursor(records[-1])
+        return Response({
+            'cursor': cursor,
+            'more': more,
+            'results': DataShareSerializer(records, many=True).data
+        })
+
+
+def encode_sync_cursor(data):
+    position = "{0}|{1}".format(data.last_updated.isoformat(), data.uuid)
+    return urlsafe_b64encode(position.encode()).decode()
 
-        serializer = DataListSerializer(queryset, many=True)
-        return Response(serializer.data)
 
-    def paginate_queryset(self, queryset):
-        if self.paginator and \
-                self.request.query_params.get(
-                    self.paginator.page_query_param, None) == 'no':
-            return None
-        return super().paginate_queryset(queryset)
+def decode_sync_cursor(cursor):
+    try:
+        position = urlsafe_b64decode(cursor.encode()).decode()
+        last_updated, uuid = position.split("|")
+        return (datetime.fromisoformat(last_updated), UUID(uuid))
+    except (BinasciiError, UnicodeDecodeError) as e:
+        raise ValueError(e)
 
 
 class DataReadUpdate(generics.RetrieveUpdateAPIView):
@@ -141,3 +215,88 @@ class DataReadUpdate(generics.RetrieveUpdateAPIView):
     serializer_class = DataInputSerializer
     lookup_field = 'uuid'
     permission_classes = [DataPrivacyMode, IsOwnerOrReadOnly]
+
+
+class DataBulkUpdate(generics.GenericAPIView):
+    """
+    Endpoint for sharing data in bulk between covid-ht nodes.
+
+    Receives a list of records which are created or updated (PUT-as-create)
+    by their uuid, ignoring the ones which chtuid is the same as the current
+    node or which are already in place, and returns the status of each
+    record.
+    """
+    queryset = Data.objects.all()
+    serializer_class = DataBulkInputSerializer
+    permission_classes = [DataPrivacyMode, ]
+
+    def put(self, request, format=None):
+        if not isinstance(request.data, list):
+            return Response(
+                {'detail': _("A list of records must be submitted.")},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        max_size = settings.DATA_BULK_MAX_SIZE
+        if len(request.data) > max_size:
+            return Response(
+                {'detail': _("At most %(max_size)s records can be submitted "
+                             "at once.") % {'max_size': max_size}},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        results, records = validate_shared_records(
+            request.data, self.get_serializer_class()
+        )
+        created, updated = Data.bulk_upsert(
+            records, self.request.user, self.request.user.unit
+        )
+        statuses = {str(data.uuid): status.HTTP_201_CREATED
+                    for data in created}
+        statuses.update({str(data.uuid): status.HTTP_200_OK
+                         for data in updated})
+        for result in results:
+            if result['status'] is None:
+                result['status'] = statuses.get(
+                    result['uuid'], status.HTTP_208_ALREADY_REPORTED
+                )
+        return Response(results, status=status.HTTP_200_OK)
+
+
+class DataImport(generics.GenericAPIView):
+    """
+    Endpoint for importing data in bulk from a file (i.e. exports of
+    analyzers or other systems).
+
+    Receives a CSV (with a header) or JSONL file as ``file`` - its format
+    is given by its extension or the ``file_format`` parameter - whose records
+    are created for the user and its unit, and returns the amount of
+    records created and the errors of the ones which were not.
+    """
+    queryset = Data.objects.all()
+    serializer_class = DataBulkInputSerializer
+    permission_classes = [DataPrivacyMode, ]
+    parser_classes = [MultiPartParser, FileUploadParser, ]
+
+    def post(self, request, format=None):
+        if not request.user.unit:
+            return Response(
+                {'detail': _("A unit must be selected for a User in order to "
+                             "input data.")},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        file = request.data.get('file', None)
+        if file is None:
+            return Response(
+                {'detail': _("A file must be submitted.")},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        file_format = request.query_params.get('file_format', None) \
+            or get_file_format(file.name)
+        if file_format not in FORMATS:
+            return Response(
+                {'detail': _("The file must be in CSV or JSONL format.")},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        result = import_file(
+            file, file_format, request.user, request.user.unit
+        )
+        return Response(result, status=status.HTTP_200_OK)
@@ -1,18 +1,24 @@
 #
-from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
 from django.conf import settings
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.http import Http404
 from django.shortcuts import (get_object_or_404, redirect, render, )
 from django.utils import timezone
 from django.utils.decorators import method_decorator
+from django.utils.functional import SimpleLazyObject
 # from django.utils.translation import gettext_lazy as _
 from rest_framework import generics
 
+from base import fragment_cache
+
+from .columnar import ColumnarExportViewMixin
 from .forms import (DataInputForm, )
-from .models import Data
+from .mixins import StreamingCSVViewMixin
+from .models import Data, DataStatistics
+from .pagination import decode_cursor, paginate_keyset
 from .renderers import PublicCSVRenderer
 from .serializers import PublicDataSerializer
+from .tables import PUBLIC_DATA_TABLE
 from .v1.views import DataPrivacyMode
 
 
@@ -28,49 +34,48 @@ def is_not_allowed_in_data_privacy_mode(function):
 
 @is_not_allowed_in_data_privacy_mode
 def public_list(request):
-    page = request.GET.get('page', 1)
-    data_qs = Data.objects.filter(is_finished=True).order_by("-timestamp")
-
-    # Pagination
-    paginator = Paginator(data_qs, 50)
-    try:
-        data = paginator.page(page)
-    except PageNotAnInteger:  # pragma: no cover
-        data = paginator.page(1)
-    except EmptyPage:  # pragma: no cover
-        data = paginator.page(paginator.num_pages)
-
-    fields_all = list(Data._meta.fields)
-    fields_excluded = [
-        'id', 'user_id', 'unit_ii', 'timestamp', 'unit', 'uuid',
-    ]
-    fields = [
-        field for field in fields_all if field.attname not in fields_excluded
-    ]
-    rows = data_qs.count()
-    cols = len(fields)
-    if rows:
-        last_updated = Data.objects.last().timestamp
-    else:
-        last_updated = None
+    cursor = request.GET.get('cursor', None)
+    if cursor:
+        try:
+            decode_cursor(cursor)
+        except ValueError:
+            cursor = None
+    data_qs = PUBLIC_DATA_TABLE.get_queryset(
+        Data.objects.filter(is_finished=True)
+    )
+
+    # Lazy, so they are not queried when the page is in the cache
+    data = SimpleLazyObject(lambda: paginate_keyset(data_qs, cursor, 50))
     return render(
         request,
         'data/public_list.html',
         {
             'data': data,
-            'fields': fields,
-            'rows': rows,
-            'cols': cols,
-            'last_updated': last_updated
+            'columns': PUBLIC_DATA_TABLE.columns,
+            'table_rows': SimpleLazyObject(
+                lambda: PUBLIC_DATA_TABLE.render_rows(data)
+            ),
+            'statistics': SimpleLazyObject(DataStatistics.get_global),
+            'cols': len(PUBLIC_DATA_TABLE),
+            'cursor': cursor,
+            **fragment_cache.get_context('data')
         }
     )
 
 
-class CSV(generics.ListAPIView):
+def format_csv_timestamp(timestamp):
+    return timestamp.strftime("%Y-%m-%d %H:%M")
+
+
+class CSV(StreamingCSVViewMixin, generics.ListAPIView):
     renderer_classes = (PublicCSVRenderer, )
     serializer_class = PublicDataSerializer
     queryset = Data.objects.filter(is_finished=True)
     permission_classes = [DataPrivacyMode, ]
+    csv_columns = {
+        'unit': (('unit_id', ), None),
+        'timestamp': (('timestamp', ), format_csv_timestamp),
+    }
 
     def finalize_response(self, request, response, *args, **kwargs):
         response['Content-Disposition'] = \
@@ -80,6 +85,12 @@ class CSV(generics.ListAPIView):
         return super().finalize_response(request, response, *args, **kwargs)
 
 
+class Columnar(ColumnarExportViewMixin, generics.ListAPIView):
+    serializer_class = PublicDataSerializer
+    queryset = Data.objects.filter(is_finished=True)
+    permission_classes = [DataPrivacyMode, ]
+
+
 @is_not_allowed_in_data_privacy_mode
 def detail(request, uuid):
     data = get_object_or_404(Data, uuid=uuid)
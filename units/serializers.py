@@ -10,7 +10,8 @@ class UnitDataSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Data
-        exclude = ['uuid', 'unit'] + model.get_conversion_fields()
+        exclude = ['uuid', 'unit', 'last_updated'] + \
+            model.get_conversion_fields()
 
     def get_user(self, obj):
         return obj.user.name
@@ -2,7 +2,7 @@
 from copy import deepcopy
 
 from django.urls import reverse
-from django.test import SimpleTestCase, Client
+from django.test import SimpleTestCase, Client, override_settings
 
 from base.models import User
 from data.models import Data
@@ -10,6 +10,9 @@ from data.models import Data
 from .models import Unit
 
 
+@override_settings(CACHES={'default': {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+}})
 class TestUnits(SimpleTestCase):
     databases = "__all__"
 
@@ -339,7 +342,16 @@ class TestUnits(SimpleTestCase):
             "attachment; filename=covid-ht-unit-",
             response.get('Content-Disposition')
         )
-        self.assertEqual(response.content, bytes(expected_response, 'utf-8'))
+        self.assertEqual(
+            b''.join(response.streaming_content),
+            bytes(expected_response, 'utf-8')
+        )
+
+    def test_columnar_restricted_access(self):
+        self.client.logout()
+        for name in ("units:current:data-parquet", "units:current:data-arrow"):
+            response = self.client.get(reverse(name))
+            self.assertEqual(response.status_code, 403)
 
     def test_unit_data_no_data(self):
         self.client.force_login(user=self.user)
@@ -38,6 +38,14 @@ urlpatterns_unit = [
          views.CSV().as_view(),
          name="data-csv"
          ),
+    path('data/parquet',
+         views.Columnar.as_view(file_format='parquet'),
+         name="data-parquet"
+         ),
+    path('data/arrow',
+         views.Columnar.as_view(file_format='arrow'),
+         name="data-arrow"
+         ),
     path('',
          views.unit_dashboard,
          name="dashboard"
@@ -2,16 +2,25 @@
 from django.contrib.auth.decorators import (login_required, user_passes_test)
 from django.contrib.auth.forms import SetPasswordForm
 from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
-from django.db.models import (Count, Max)
+from django.db.models import (CharField, Count, F, Q, Value)
+from django.db.models.functions import Coalesce, Concat, Upper
 from django.http import Http404
 from django.shortcuts import (get_object_or_404, redirect, render, )
 # from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
 
 from rest_framework import generics
+from rest_framework.permissions import IsAuthenticated
 
+from base import fragment_cache
 from base.models import User
-from data.models import Data
+from data.columnar import ColumnarExportViewMixin
+from data.mixins import StreamingCSVViewMixin
+from data.models import Data, DataStatistics
+from data.pagination import paginate_keyset
+from data.tables import UNIT_DATA_TABLE
+from data.views import format_csv_timestamp
 
 from .forms import (UnitUserChangeForm, UnitUserCreationForm, UnitEditForm)
 from .models import Unit
@@ -24,47 +33,57 @@ from .serializers import UnitDataSerializer
 def list(request):
     page = request.GET.get('page', 1)
     units = Unit.objects\
-        .annotate(data_amount=Count('data'))\
-        .annotate(last_updated=Max('data__timestamp'))\
+        .annotate(data_amount=Coalesce('data_statistics__data_count', 0))\
+        .annotate(last_updated=F('data_statistics__last_timestamp'))\
         .order_by("id")
 
     # Pagination
-    paginator = Paginator(units, 50)
-    try:
-        units = paginator.page(page)
-    except PageNotAnInteger:  # pragma: no cover
-        units = paginator.page(1)
-    except EmptyPage:  # pragma: no cover
-        units = paginator.page(paginator.num_pages)
+    def get_page():
+        paginator = Paginator(units, 50)
+        try:
+            return paginator.page(page)
+        except PageNotAnInteger:  # pragma: no cover
+            return paginator.page(1)
+        except EmptyPage:  # pragma: no cover
+            return paginator.page(paginator.num_pages)
 
     return render(
         request,
         'units/list.html',
         {
-            'units': units,
+            # Lazy, so it is not queried when the page is in the cache
+            'units': SimpleLazyObject(get_page),
+            'page': page,
+            **fragment_cache.get_context('data', 'units')
         }
     )
 
 
+def get_members_sizes(unit):
+    """
+    Returns the amount of data inputters and managers of the unit.
+    """
+    sizes = unit.users.aggregate(
+        data=Count('pk', filter=Q(user_type=User.DATA)),
+        manager=Count('pk', filter=Q(user_type=User.MANAGER)),
+    )
+    return (sizes['data'], sizes['manager'])
+
+
 def detail(request, pk):
     unit = get_object_or_404(Unit, pk=pk)
-    members_di_size = unit.users.filter(user_type=User.DATA).count()
-    members_m_size = unit.users.filter(user_type=User.MANAGER).count()
-    data_size = unit.data.count()
-    data_last = Data.objects.last()
-    if data_last:
-        data_last_updated = data_last.timestamp
-    else:
-        data_last_updated = None
     return render(
         request,
         'units/detail.html',
         {
             'unit': unit,
-            'members_di_size': members_di_size,
-            'members_m_size': members_m_size,
-            'data_size': data_size,
-            'data_last_updated': data_last_updated
+            # Lazy, so they are not queried when the page is in the cache
+            'members_sizes': SimpleLazyObject(lambda: get_members_sizes(unit)),
+            'unit_statistics': SimpleLazyObject(
+                lambda: DataStatistics.get_for_unit(unit)
+            ),
+            'statistics': SimpleLazyObject(DataStatistics.get_global),
+            **fragment_cache.get_context('data', 'units')
         }
     )
 
@@ -75,14 +94,9 @@ def detail(request, pk):
 def unit_dashboard(request):
     unit = request.user.unit
     if unit:
-        members_di_size = unit.users.filter(user_type=User.DATA).count()
-        members_m_size = unit.users.filter(user_type=User.MANAGER).count()
-        data_size = unit.data.count()
-        data_last = Data.objects.last()
-        if data_last:
-            data_last_updated = data_last.timestamp
-        else:
-            data_last_updated = None
+        members_di_size, members_m_size = get_members_sizes(unit)
+        data_size = DataStatistics.get_for_unit(unit).data_count
+        data_last_updated = DataStatistics.get_global().last_timestamp
     else:
         members_di_size = None
         members_m_size = None
@@ -220,27 +234,22 @@ def unit_users_set_password(request, pk):
 
 @login_required
 def unit_data(request):
-    page = request.GET.get('page', 1)
-    data = Data.objects.filter(unit=request.user.unit).select_related("user")
+    cursor = request.GET.get('cursor', None)
+    data = UNIT_DATA_TABLE.get_queryset(
+        Data.objects.filter(unit=request.user.unit)
+    )
+
+    statistics = DataStatistics.get_global()
 
     # Pagination
-    paginator = Paginator(data, 20)
     try:
-        data = paginator.page(page)
-    except PageNotAnInteger:  # pragma: no cover
-        data = paginator.page(1)
-    except EmptyPage:  # pragma: no cover
-        data = paginator.page(paginator.num_pages)
-
-    fields_all = Data._meta.get_fields()
-    fields_excluded = ['id', 'unit_id', 'user_id', 'uuid']
-    fields = [
-        field for field in fields_all if field.attname not in fields_excluded
-    ]
-    rows = Data.objects.count()
-    cols = len(fields)
+        data = paginate_keyset(data, cursor, 20)
+    except ValueError:
+        data = paginate_keyset(data, None, 20)
+
+    rows = statistics.data_count
     if rows:
-        last_updated = Data.objects.last().timestamp
+        last_updated = statistics.last_timestamp
     else:
         last_updated = None
     return render(
@@ -248,22 +257,30 @@ def unit_data(request):
         'units/data.html',
         {
             'data': data,
-            'fields': fields,
+            'columns': UNIT_DATA_TABLE.columns,
+            'table_rows': UNIT_DATA_TABLE.render_rows(data),
             'rows': rows,
-            'cols': cols,
+            'cols': len(UNIT_DATA_TABLE),
             'last_updated': last_updated
         }
     )
 
 
-class CSV(generics.ListAPIView):
+def format_csv_user(first_name, last_name):
+    return "{0} {1}".format(first_name.upper(), last_name.upper())
+
+
+class CSV(StreamingCSVViewMixin, generics.ListAPIView):
     renderer_classes = (UnitCSVRenderer, )
     serializer_class = UnitDataSerializer
     queryset = Data.objects.all()
+    csv_columns = {
+        'user': (('user__first_name', 'user__last_name'), format_csv_user),
+        'timestamp': (('timestamp', ), format_csv_timestamp),
+    }
 
     def get_queryset(self):
-        return Data.objects.filter(unit=self.request.user.unit)\
-            .select_related("user")
+        return Data.objects.filter(unit=self.request.user.unit)
 
     def finalize_response(self, request, response, *args, **kwargs):
         response['Content-Disposition'] = \
@@ -272,3 +289,23 @@ class CSV(generics.ListAPIView):
                 self.request.user.unit.pk
             )
         return super().finalize_response(request, response, *args, **kwargs)
+
+
+class Columnar(ColumnarExportViewMixin, generics.ListAPIView):
+    serializer_class = UnitDataSerializer
+    permission_classes = [IsAuthenticated, ]
+    export_expressions = {
+        'user': Concat(
+            Upper('user__first_name'), Value(" "), Upper('user__last_name'),
+            output_field=CharField()
+        ),
+    }
+
+    def get_queryset(self):
+        return Data.objects.filter(unit=self.request.user.unit)
+
+    def get_export_filename(self):
+        return "covid-ht-unit-{1}-data-{0}UTC".format(
+            timezone.now().utcnow().strftime("%Y%m%dT%I%M"),
+            self.request.user.unit.pk
+        )